@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import re
+from time import monotonic
+from typing import Awaitable, Callable, List, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+
+# Product data only changes when an ingestion run finishes, which bumps the
+# data version. Keys include it, so a bump leaves every older entry unused.
+CACHEABLE_PATHS = [
+    re.compile(r"^/products/?$"),
+    re.compile(r"^/products/top/?$"),
+    re.compile(r"^/products/\d+/reviews/?$"),
+]
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str
+
+
+class MemoryBackend:
+    """Least recently used entries are dropped past `max_entries`, any entry after `ttl`."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        item = self.entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse):
+        self.entries[key] = (monotonic() + self.ttl, entry)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class RedisBackend:
+    """Entries shared by every API process, expired by Redis after `ttl`."""
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "api-cache:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        fields = await self.client.hgetall(self.prefix + key)
+        if not fields:
+            return None
+        return CachedResponse(
+            body=fields[b"body"],
+            etag=fields[b"etag"].decode(),
+            media_type=fields[b"media_type"].decode(),
+        )
+
+    async def set(self, key: str, entry: CachedResponse):
+        key = self.prefix + key
+        async with self.client.pipeline(transaction=True) as pipeline:
+            pipeline.hset(
+                key,
+                mapping={
+                    "body": entry.body,
+                    "etag": entry.etag,
+                    "media_type": entry.media_type,
+                },
+            )
+            pipeline.expire(key, self.ttl)
+            await pipeline.execute()
+
+
+class ResponseCache:
+    """Caches successful GET responses of the product listings, with ETags.
+
+    The data version is read from the database at most once every
+    `version_poll_seconds`, so a finished scrape run takes that long to
+    invalidate the cache.
+    """
+
+    def __init__(
+        self,
+        backend,
+        get_version: Callable[[], Awaitable[int]],
+        version_poll_seconds: float = 5,
+        paths: Optional[List[re.Pattern]] = None,
+    ):
+        self.backend = backend
+        self.get_version = get_version
+        self.version_poll_seconds = version_poll_seconds
+        self.paths = paths or CACHEABLE_PATHS
+        self.version = None
+        self.version_checked_at = None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def cacheable(self, request: Request) -> bool:
+        return request.method == "GET" and any(
+            path.match(request.url.path) for path in self.paths
+        )
+
+    async def current_version(self) -> int:
+        now = monotonic()
+        if (
+            self.version is None
+            or now - self.version_checked_at >= self.version_poll_seconds
+        ):
+            self.version = await self.get_version()
+            self.version_checked_at = now
+        return self.version
+
+    @staticmethod
+    def key(request: Request, version: int) -> str:
+        """Data version, path and query parameters, sorted and without blanks."""
+        params = sorted(
+            (name, value) for name, value in request.query_params.multi_items() if value
+        )
+        return f"{version}:{request.url.path.rstrip('/')}?{urlencode(params)}"
+
+    @staticmethod
+    def etag(version: int, body: bytes) -> str:
+        return f'"{version}-{hashlib.sha1(body).hexdigest()}"'
+
+    def respond(self, request: Request, entry: CachedResponse, state: str) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": state}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry.etag in (tag.strip() for tag in if_none_match.split(",")):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    async def __call__(self, request: Request, call_next) -> Response:
+        if not self.cacheable(request):
+            return await call_next(request)
+
+        try:
+            version = await self.current_version()
+        except Exception as e:
+            print(f"Error reading the data version, bypassing the cache: {e}")
+            return await call_next(request)
+        key = self.key(request, version)
+        entry = await self.backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return self.respond(request, entry, "HIT")
+
+        self.misses += 1
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = CachedResponse(
+            body=body,
+            etag=self.etag(version, body),
+            media_type=response.headers.get("content-type"),
+        )
+        await self.backend.set(key, entry)
+        return self.respond(request, entry, "MISS")
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+        }
@@ -0,0 +1,182 @@
+import base64
+from datetime import datetime
+import json
+import math
+from typing import List, Optional, Tuple
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import DateTime, and_, func, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .exceptions import InternalError, InvalidParameterError
+from .response_models import PaginatedMetadata
+
+
+class Keyset:
+    """A sort column plus the id tiebreaker, for ordering and cursor pagination.
+
+    NULL sort values always come last, whatever the sort order.
+    """
+
+    def __init__(self, name: str, column, id_column, order: str = "asc"):
+        self.name = name
+        self.column = column
+        self.id_column = id_column
+        self.order = order
+
+    def order_by(self) -> list:
+        if self.order == "desc":
+            return [self.column.desc().nulls_last(), self.id_column.desc()]
+        return [self.column.asc().nulls_last(), self.id_column.asc()]
+
+    def cursor_for(self, item) -> str:
+        """Opaque cursor pointing just past `item`."""
+        value = getattr(item, self.column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        payload = {
+            "sort": self.name,
+            "order": self.order,
+            "value": value,
+            "id": getattr(item, self.id_column.key),
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def after(self, cursor: str) -> list:
+        """Filters for the rows after `cursor`, to be read one after the other.
+
+        Non-NULL rows past the cursor come first, then the NULL rows. Each
+        filter on its own can be answered by a range scan of the matching
+        index, which one filter OR-ing both could not.
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            value, last_id = payload["value"], int(payload["id"])
+            if value is not None and isinstance(self.column.type, DateTime):
+                value = datetime.fromisoformat(value)
+        except (ValueError, TypeError, KeyError):
+            raise InvalidParameterError("cursor", "Malformed cursor")
+        if (payload["sort"], payload["order"]) != (self.name, self.order):
+            raise InvalidParameterError(
+                "cursor", "Cursor was issued for a different sort_by or sort_order"
+            )
+
+        descending = self.order == "desc"
+        past_id = self.id_column < last_id if descending else self.id_column > last_id
+        if self.column is self.id_column:
+            return [past_id]
+        if value is None:
+            return [and_(self.column.is_(None), past_id)]
+        row, last_row = tuple_(self.column, self.id_column), tuple_(value, last_id)
+        return [row < last_row if descending else row > last_row, self.column.is_(None)]
+
+
+async def estimate_count(db: AsyncSession, query) -> int:
+    """Row estimate from the planner, without running the query.
+
+    Parameters stay bound: not every type can be rendered as a literal
+    (e.g. the REGCONFIG of the fulltext search).
+    """
+    statement = query.order_by(None).compile(
+        dialect=postgresql.dialect(paramstyle="named"),
+        compile_kwargs={"render_postcompile": True},
+    )
+    result = await db.execute(
+        text(f"EXPLAIN (FORMAT JSON) {statement}"), statement.params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count(db: AsyncSession, query, total: str) -> Optional[int]:
+    if total == "exact":
+        return await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+    if total == "estimate":
+        return await estimate_count(db, query)
+    return None
+
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    page: int = 1,
+    limit: int = 10,
+    keyset: Optional[Keyset] = None,
+    cursor: Optional[str] = None,
+    total: str = "exact",
+    scalars: bool = True,
+) -> Tuple[List, PaginatedMetadata]:
+    """Fetch one page of `query` by page number, or after `cursor` if given.
+
+    A cursor page costs the same however deep it is, an offset page costs
+    more the further it goes. `total` is "exact" (a count query),
+    "estimate" (the planner's row estimate) or "none". With `scalars`
+    False the items are the selected rows rather than their first column,
+    for queries that select columns instead of an entity.
+    """
+
+    async def fetch(page_query) -> list:
+        if scalars:
+            return (await db.scalars(page_query)).all()
+        return (await db.execute(page_query)).all()
+
+    try:
+        if keyset:
+            query = query.order_by(*keyset.order_by())
+        if cursor and keyset is None:
+            raise InvalidParameterError(
+                "cursor", "Cursor pagination is not available for this ordering"
+            )
+
+        row_count = await count(db, query, total)
+        total_pages = math.ceil(row_count / limit) if row_count is not None else None
+
+        # One extra row tells whether there is a next page without counting
+        if cursor:
+            items = []
+            for condition in keyset.after(cursor):
+                if len(items) > limit:
+                    break
+                page_query = query.where(condition).limit(limit + 1 - len(items))
+                items += await fetch(page_query)
+        else:
+            if total == "exact" and page > total_pages and total_pages > 0:
+                raise InvalidParameterError(
+                    "page", f"Page {page} exceeds available pages ({total_pages})"
+                )
+            page_query = query.offset((page - 1) * limit).limit(limit + 1)
+            items = await fetch(page_query)
+        has_next = len(items) > limit
+        items = items[:limit]
+
+        metadata = PaginatedMetadata(
+            total=row_count,
+            total_is_estimate=total == "estimate",
+            page=None if cursor else page,
+            limit=limit,
+            total_pages=total_pages,
+            has_next=has_next,
+            has_previous=bool(cursor) or page > 1,
+            next_cursor=keyset.cursor_for(items[-1]) if keyset and has_next else None,
+        )
+
+        return items, metadata
+    except SQLAlchemyError as e:
+        raise InternalError(str(e))
+
+
+def rows_response(items: List, metadata: PaginatedMetadata) -> ORJSONResponse:
+    """A page of column rows, serialized by orjson without going through Pydantic.
+
+    The rows already have the shape of the response model, validating them
+    again would only cost time.
+    """
+    return ORJSONResponse(
+        {"metadata": metadata.model_dump(), "items": [row._asdict() for row in items]}
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
 
 
 # Review Response Models
@@ -43,12 +43,14 @@ class ProductWithReviewsResponse(ProductBase):
 
 # Pagination Response Models
 class PaginatedMetadata(BaseModel):
-    total: int
-    page: int
+    total: Optional[int]
+    total_is_estimate: bool = False
+    page: Optional[int]
     limit: int
-    total_pages: int
+    total_pages: Optional[int]
     has_next: bool
     has_previous: bool
+    next_cursor: Optional[str] = None
 
 
 class PaginatedProductsResponse(BaseModel):
@@ -61,6 +63,80 @@ class PaginatedReviewsResponse(BaseModel):
     items: List[ReviewResponse]
 
 
+# History Response Models
+class HistoryPoint(BaseModel):
+    time: datetime
+    price: Optional[float]
+    min_price: Optional[float]
+    max_price: Optional[float]
+    average_rating: Optional[float]
+    review_count: Optional[int]
+
+
+class ProductHistoryResponse(BaseModel):
+    product_id: int
+    start: datetime
+    end: datetime
+    bucket: str
+    points: List[HistoryPoint]
+
+
+# Analytics Response Models
+class CatalogSummaryResponse(BaseModel):
+    product_count: int
+    brand_count: int
+    average_price: Optional[float]
+    average_rating: Optional[float]
+    review_count: int
+    refreshed_at: Optional[datetime]
+
+
+class BrandStats(BaseModel):
+    brand: str
+    product_count: int
+    average_price: Optional[float]
+    min_price: Optional[float]
+    max_price: Optional[float]
+    average_rating: Optional[float]
+    review_count: int
+
+
+class RatingBucket(BaseModel):
+    min_rating: float
+    product_count: int
+
+
+class PriceBucket(BaseModel):
+    min_price: float
+    max_price: Optional[float]
+    product_count: int
+    average_rating: Optional[float]
+
+
+# Batch Lookup Models
+class BatchProductsRequest(BaseModel):
+    asins: List[str] = []
+    ids: List[int] = []
+    include_reviews: bool = False
+    reviews_per_product: int = Field(5, ge=0, le=100)
+    review_sort: str = Field("review_date", pattern="^(review_date|rating)$")
+
+
+class BatchProduct(ProductBase):
+    reviews: Optional[List[ReviewResponse]] = None
+
+
+class BatchProductResult(BaseModel):
+    found: bool
+    product: Optional[BatchProduct]
+
+
+class BatchProductsResponse(BaseModel):
+    # Keyed by the requested ASIN, or by the requested id for id lookups
+    asins: Dict[str, BatchProductResult]
+    ids: Dict[int, BatchProductResult]
+
+
 # Error Response Models
 class ErrorResponse(BaseModel):
     detail: str
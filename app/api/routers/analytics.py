@@ -0,0 +1,104 @@
+from typing import List, Optional
+from fastapi import APIRouter, Query, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..exceptions import APIError, InternalError
+from ..response_models import (
+    BrandStats,
+    CatalogSummaryResponse,
+    ErrorResponse,
+    PriceBucket,
+    RatingBucket,
+)
+from database import (
+    brand_stats_view,
+    catalog_summary_view,
+    get_async_db,
+    price_buckets_view,
+    rating_distribution_view,
+)
+
+
+# Aggregates are read from materialized views refreshed after each scrape
+# run, so they cost the same whatever the size of the catalog
+router = APIRouter(prefix="/products/analytics")
+
+BRAND_SORT_COLUMNS = {
+    "product_count": brand_stats_view.c.product_count,
+    "average_price": brand_stats_view.c.average_price,
+    "average_rating": brand_stats_view.c.average_rating,
+    "review_count": brand_stats_view.c.review_count,
+}
+
+ERROR_RESPONSES = {500: {"model": ErrorResponse, "description": "Internal Server Error"}}
+
+
+@router.get("/summary", response_model=CatalogSummaryResponse, responses=ERROR_RESPONSES)
+async def get_catalog_summary(db: AsyncSession = Depends(get_async_db)):
+    """Product, brand and review totals of the catalog"""
+    try:
+        row = (await db.execute(select(catalog_summary_view))).one()
+        return CatalogSummaryResponse(**row._mapping)
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
+
+
+@router.get("/brands", response_model=List[BrandStats], responses=ERROR_RESPONSES)
+async def get_brand_stats(
+    db: AsyncSession = Depends(get_async_db),
+    sort_by: str = Query(
+        "product_count",
+        description="Sort field: product_count, average_price, average_rating or review_count",
+        regex=f"^({'|'.join(BRAND_SORT_COLUMNS)})$",
+    ),
+    sort_order: str = Query("desc", regex="^(asc|desc)$"),
+    min_products: Optional[int] = Query(None, ge=1, description="Skip smaller brands"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Product count, price range and average rating of each brand"""
+    try:
+        column = BRAND_SORT_COLUMNS[sort_by]
+        column = column.desc() if sort_order == "desc" else column.asc()
+        query = (
+            select(brand_stats_view)
+            .order_by(column.nulls_last(), brand_stats_view.c.brand)
+            .limit(limit)
+        )
+        if min_products:
+            query = query.where(brand_stats_view.c.product_count >= min_products)
+        return [BrandStats(**row._mapping) for row in await db.execute(query)]
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
+
+
+@router.get("/ratings", response_model=List[RatingBucket], responses=ERROR_RESPONSES)
+async def get_rating_distribution(db: AsyncSession = Depends(get_async_db)):
+    """Number of rated products in each half-star bucket"""
+    try:
+        rows = await db.execute(
+            select(rating_distribution_view).order_by(rating_distribution_view.c.min_rating)
+        )
+        return [RatingBucket(**row._mapping) for row in rows]
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
+
+
+@router.get("/prices", response_model=List[PriceBucket], responses=ERROR_RESPONSES)
+async def get_price_buckets(db: AsyncSession = Depends(get_async_db)):
+    """Number of priced products and their average rating in each price range"""
+    try:
+        rows = await db.execute(
+            select(price_buckets_view).order_by(price_buckets_view.c.min_price)
+        )
+        return [PriceBucket(**row._mapping) for row in rows]
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
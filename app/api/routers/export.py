@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from ..response_models import ErrorResponse
+from config import get_config
+from database import get_async_sessionmaker
+from export import (
+    MEDIA_TYPES,
+    ProductAssembler,
+    csv_header,
+    export_query,
+    to_csv,
+    to_ndjson,
+)
+
+
+config = get_config()
+
+router = APIRouter(prefix="/products/export")
+
+
+async def stream_products(
+    output_format: str,
+    include_reviews: bool,
+    updated_since: Optional[datetime],
+    batch_size: int,
+):
+    # The session is opened here rather than taken from get_async_db, whose
+    # cleanup runs before a streaming response has been sent
+    Session = get_async_sessionmaker(config.DATABASE_URL)
+    encode = to_csv if output_format == "csv" else to_ndjson
+    if output_format == "csv":
+        yield csv_header(include_reviews)
+
+    async with Session() as session:
+        query = export_query(include_reviews, updated_since)
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        assembler = ProductAssembler(include_reviews)
+        async for rows in result.partitions():
+            chunk = []
+            for row in rows:
+                product = assembler.add(row)
+                if product is not None:
+                    chunk.append(encode(product))
+            if chunk:
+                yield "".join(chunk)
+        product = assembler.finish()
+        if product is not None:
+            yield encode(product)
+
+
+@router.get(
+    "/",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}},
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+    },
+)
+async def export_products(
+    format: str = Query(
+        "ndjson", description="ndjson (one product per line) or csv", regex="^(ndjson|csv)$"
+    ),
+    include_reviews: bool = Query(True, description="Nest each product's reviews"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Only products scraped at or after this time"
+    ),
+    batch_size: int = Query(
+        1000, ge=100, le=10000, description="Rows fetched per cursor round trip"
+    ),
+):
+    """Stream the whole catalog through a server-side cursor, in constant memory"""
+    return StreamingResponse(
+        stream_products(format, include_reviews, updated_since, batch_size),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="products.{format}"'
+        },
+    )
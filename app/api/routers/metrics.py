@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Request
+
+from database import get_pool_stats
+from scraper.rate_limiter import get_rate_limiter_metrics
+
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats():
+    """Connection pool usage and request wait times for this process"""
+    try:
+        return get_pool_stats()
+    except Exception as e:
+        print(f"Error getting database pool stats: {str(e)}")
+        raise
+
+
+@router.get("/rate-limiter")
+async def get_rate_limiter_stats():
+    """Per-host rates and throttle events of the latest scrape run in this process"""
+    return get_rate_limiter_metrics()
+
+
+@router.get("/response-cache")
+async def get_response_cache_stats(request: Request):
+    """Hits, misses and 304s of the product listing cache of this process"""
+    cache = request.app.state.response_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
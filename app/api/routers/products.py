@@ -1,9 +1,9 @@
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Query, Path, Depends
-from sqlalchemy import desc, asc
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
-import math
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import desc, func, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..exceptions import (
     APIError,
@@ -12,17 +12,90 @@ from ..exceptions import (
     InvalidParameterError,
 )
 from ..response_models import (
+    BatchProductsRequest,
+    BatchProductsResponse,
+    ProductResponse,
     ProductWithReviewsResponse,
     PaginatedProductsResponse,
     PaginatedReviewsResponse,
-    PaginatedMetadata,
+    ProductHistoryResponse,
+    HistoryPoint,
+    ReviewResponse,
     ErrorResponse,
 )
-from database import ProductDB, ReviewDB, get_db
+from ..pagination import Keyset, paginate, rows_response
+from config import get_config
+from database import ProductDB, ProductSnapshotDB, ReviewDB, get_async_db
 
 
+config = get_config()
+
 router = APIRouter(prefix="/products")
 
+# Listings select the response fields as columns, skipping ORM hydration
+PRODUCT_COLUMNS = [getattr(ProductDB, field) for field in ProductResponse.model_fields]
+REVIEW_COLUMNS = [getattr(ReviewDB, field) for field in ReviewResponse.model_fields]
+
+PRODUCT_SORT_COLUMNS = {
+    "price": ProductDB.price,
+    "rating": ProductDB.average_rating,
+    "average_rating": ProductDB.average_rating,
+    "review_count": ProductDB.review_count,
+}
+
+HISTORY_BUCKETS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+}
+
+REVIEW_SORT_COLUMNS = {
+    "review_date": ReviewDB.review_date,
+    "rating": ReviewDB.rating,
+}
+
+
+async def load_first_reviews(
+    db: AsyncSession,
+    product_ids: List[int],
+    per_product: Optional[int],
+    review_sort: str,
+) -> Dict[int, List[dict]]:
+    """The first `per_product` reviews of each product, newest or best rated first.
+
+    One query: each product is joined to a LATERAL subquery read from the
+    (product_id, sort column, id) index, so at most `per_product` rows are
+    transferred per product. None loads every review.
+    """
+    reviews = {product_id: [] for product_id in product_ids}
+    if not product_ids or per_product == 0:
+        return reviews
+    first = (
+        select(*REVIEW_COLUMNS)
+        .where(ReviewDB.product_id == ProductDB.id)
+        .order_by(
+            REVIEW_SORT_COLUMNS[review_sort].desc().nulls_last(),
+            ReviewDB.id.desc(),
+        )
+        .limit(per_product)
+        .lateral("first_reviews")
+    )
+    rows = await db.execute(
+        select(ProductDB.id.label("product_id"), first)
+        .join(first, true())
+        .where(ProductDB.id.in_(product_ids))
+        .order_by(
+            ProductDB.id,
+            first.c[review_sort].desc().nulls_last(),
+            first.c.id.desc(),
+        )
+    )
+    for row in rows:
+        review = row._asdict()
+        reviews[review.pop("product_id")].append(review)
+    return reviews
+
 
 def validate_sort_parameters(sort_by: Optional[str], valid_fields: List[str]):
     """Validate sort parameters against allowed fields"""
@@ -32,33 +105,6 @@ def validate_sort_parameters(sort_by: Optional[str], valid_fields: List[str]):
         )
 
 
-def paginate(query, page: int = 1, limit: int = 10):
-    try:
-        total = query.count()
-        total_pages = math.ceil(total / limit)
-
-        if page > total_pages and total_pages > 0:
-            raise InvalidParameterError(
-                "page", f"Page {page} exceeds available pages ({total_pages})"
-            )
-
-        offset = (page - 1) * limit
-        items = query.offset(offset).limit(limit).all()
-
-        metadata = PaginatedMetadata(
-            total=total,
-            page=page,
-            limit=limit,
-            total_pages=total_pages,
-            has_next=page < total_pages,
-            has_previous=page > 1,
-        )
-
-        return items, metadata
-    except SQLAlchemyError as e:
-        raise InternalError(str(e))
-
-
 @router.get(
     "/",
     response_model=PaginatedProductsResponse,
@@ -68,9 +114,15 @@ def paginate(query, page: int = 1, limit: int = 10):
     },
 )
 async def get_products(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # Search parameters
     search: Optional[str] = Query(None, description="Search in brand, model, or title"),
+    search_mode: str = Query(
+        "substring",
+        description="substring matches any part of brand, model or title; "
+        "fulltext matches whole words and ranks by relevance",
+        regex="^(substring|fulltext)$",
+    ),
     brand: Optional[str] = Query(None, description="Filter by brand"),
     model: Optional[str] = Query(None, description="Filter by model"),
     # Filter parameters
@@ -88,11 +140,18 @@ async def get_products(
     # Pagination parameters
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page, replaces page"
+    ),
+    total: str = Query(
+        "exact",
+        description="Total count: exact, estimate (from the query planner) or none",
+        regex="^(exact|estimate|none)$",
+    ),
 ):
     try:
         # Validate sort parameters
-        valid_sort_fields = ["price", "rating", "review_count"]
-        validate_sort_parameters(sort_by, valid_sort_fields)
+        validate_sort_parameters(sort_by, list(PRODUCT_SORT_COLUMNS))
 
         # Validate price range
         if min_price is not None and max_price is not None and min_price > max_price:
@@ -100,47 +159,65 @@ async def get_products(
                 "price_range", "Minimum price cannot be greater than maximum price"
             )
 
-        query = db.query(ProductDB)
+        query = select(*PRODUCT_COLUMNS)
 
         # Apply search filters
-        if search:
+        rank = None
+        if search and search_mode == "fulltext":
+            ts_query = func.websearch_to_tsquery("english", search)
+            query = query.where(ProductDB.search_vector.op("@@")(ts_query))
+            rank = func.ts_rank(ProductDB.search_vector, ts_query)
+        elif search:
+            # Served by the pg_trgm indexes on these columns
             search_term = f"%{search}%"
-            query = query.filter(
+            query = query.where(
                 (ProductDB.brand.ilike(search_term))
                 | (ProductDB.model.ilike(search_term))
                 | (ProductDB.title.ilike(search_term))
             )
 
         if brand:
-            query = query.filter(ProductDB.brand.ilike(f"%{brand}%"))
+            query = query.where(ProductDB.brand.ilike(f"%{brand}%"))
         if model:
-            query = query.filter(ProductDB.model.ilike(f"%{model}%"))
+            query = query.where(ProductDB.model.ilike(f"%{model}%"))
 
         # Apply price and rating filters
         if min_price is not None:
-            query = query.filter(ProductDB.price >= min_price)
+            query = query.where(ProductDB.price >= min_price)
         if max_price is not None:
-            query = query.filter(ProductDB.price <= max_price)
+            query = query.where(ProductDB.price <= max_price)
         if min_rating is not None:
-            query = query.filter(ProductDB.average_rating >= min_rating)
+            query = query.where(ProductDB.average_rating >= min_rating)
 
-        # Apply sorting
+        # Apply sorting, relevance ranked results have no keyset to page by
+        keyset = None
         if sort_by:
-            sort_column = getattr(ProductDB, sort_by)
-            if sort_order == "desc":
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(asc(sort_column))
+            keyset = Keyset(
+                sort_by, PRODUCT_SORT_COLUMNS[sort_by], ProductDB.id, sort_order
+            )
+        elif rank is not None:
+            query = query.order_by(desc(rank), ProductDB.id)
+        else:
+            keyset = Keyset("id", ProductDB.id, ProductDB.id, sort_order)
 
         # Apply pagination
-        items, metadata = paginate(query, page, limit)
+        items, metadata = await paginate(
+            db,
+            query,
+            page,
+            limit,
+            keyset=keyset,
+            cursor=cursor,
+            total=total,
+            scalars=False,
+        )
 
         if not items and page > 1:
             raise InvalidParameterError(
                 "page", "No results found for the specified page"
             )
 
-        return PaginatedProductsResponse(metadata=metadata, items=items)
+        return rows_response(items, metadata)
 
     except APIError as e:
         raise
@@ -157,26 +234,114 @@ async def get_products(
     },
 )
 async def get_top_products(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(10, ge=1, le=50, description="Number of top products to return"),
     min_reviews: int = Query(5, ge=1, description="Minimum number of reviews required"),
+    reviews_per_product: Optional[int] = Query(
+        None,
+        ge=0,
+        le=100,
+        description="Most reviews returned with each product, all of them if not set",
+    ),
+    review_sort: str = Query(
+        "review_date",
+        description="Which reviews come first: newest (review_date) or best rated (rating)",
+        regex=f"^({'|'.join(REVIEW_SORT_COLUMNS)})$",
+    ),
 ):
     try:
         query = (
-            db.query(ProductDB)
-            .filter(ProductDB.review_count >= min_reviews)
-            .order_by(desc(ProductDB.average_rating), desc(ProductDB.review_count))
-            .options(joinedload(ProductDB.reviews))
+            select(*PRODUCT_COLUMNS)
+            .where(ProductDB.review_count >= min_reviews)
+            .order_by(
+                ProductDB.average_rating.desc().nulls_last(),
+                ProductDB.review_count.desc().nulls_last(),
+            )
+            .limit(limit)
         )
-
-        top_products = query.limit(limit).all()
+        top_products = [row._asdict() for row in await db.execute(query)]
 
         if not top_products:
             raise NotFoundError(
                 "Products", f"No products found with minimum {min_reviews} reviews"
             )
 
-        return top_products
+        reviews = await load_first_reviews(
+            db,
+            [product["id"] for product in top_products],
+            reviews_per_product,
+            review_sort,
+        )
+        for product in top_products:
+            product["reviews"] = reviews[product["id"]]
+        return ORJSONResponse(top_products)
+
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
+
+
+@router.post(
+    "/batch",
+    response_model=BatchProductsResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def get_products_batch(
+    request: BatchProductsRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """Look up many products by ASIN and/or id in one round trip.
+
+    Every requested ASIN and id gets an entry, with found false and no
+    product when it does not exist.
+    """
+    try:
+        asins = list(dict.fromkeys(request.asins))
+        ids = list(dict.fromkeys(request.ids))
+        if not asins and not ids:
+            raise InvalidParameterError("asins", "Give at least one ASIN or id")
+        if len(asins) + len(ids) > config.API_BATCH_MAX_ITEMS:
+            raise InvalidParameterError(
+                "asins", f"At most {config.API_BATCH_MAX_ITEMS} ASINs and ids per request"
+            )
+
+        # One query, answered from the asin and primary key indexes
+        conditions = []
+        if asins:
+            conditions.append(ProductDB.asin.in_(asins))
+        if ids:
+            conditions.append(ProductDB.id.in_(ids))
+        rows = await db.execute(select(*PRODUCT_COLUMNS).where(or_(*conditions)))
+        products = [row._asdict() for row in rows]
+
+        if request.include_reviews:
+            reviews = await load_first_reviews(
+                db,
+                [product["id"] for product in products],
+                request.reviews_per_product,
+                request.review_sort,
+            )
+            for product in products:
+                product["reviews"] = reviews[product["id"]]
+
+        by_asin = {product["asin"]: product for product in products}
+        by_id = {product["id"]: product for product in products}
+
+        def result(product: Optional[dict]) -> dict:
+            return {"found": product is not None, "product": product}
+
+        return ORJSONResponse(
+            {
+                "asins": {asin: result(by_asin.get(asin)) for asin in asins},
+                "ids": {
+                    str(product_id): result(by_id.get(product_id))
+                    for product_id in ids
+                },
+            }
+        )
 
     except APIError as e:
         raise
@@ -195,43 +360,166 @@ async def get_top_products(
 )
 async def get_product_reviews(
     product_id: int = Path(..., description="Product ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=100, description="Reviews per page"),
     sort_by: Optional[str] = Query("review_date", description="Sort by field"),
     sort_order: Optional[str] = Query(
         "desc", description="Sort order (asc or desc)", regex="^(asc|desc)$"
     ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page, replaces page"
+    ),
+    total: str = Query(
+        "exact",
+        description="Total count: exact, estimate (from the query planner) or none",
+        regex="^(exact|estimate|none)$",
+    ),
 ):
     try:
         # Validate sort parameters
-        valid_sort_fields = ["review_date", "rating"]
-        validate_sort_parameters(sort_by, valid_sort_fields)
+        validate_sort_parameters(sort_by, list(REVIEW_SORT_COLUMNS))
 
         # Check if product exists
-        product = db.query(ProductDB).filter(ProductDB.id == product_id).first()
-        if not product:
+        exists = await db.scalar(select(ProductDB.id).where(ProductDB.id == product_id))
+        if exists is None:
             raise NotFoundError("Product", product_id)
 
         # Query reviews
-        query = db.query(ReviewDB).filter(ReviewDB.product_id == product_id)
-
-        # Apply sorting
-        sort_column = getattr(ReviewDB, sort_by)
-        if sort_order == "desc":
-            query = query.order_by(desc(sort_column))
-        else:
-            query = query.order_by(asc(sort_column))
-
-        # Apply pagination
-        items, metadata = paginate(query, page, limit)
+        query = select(*REVIEW_COLUMNS).where(ReviewDB.product_id == product_id)
+
+        # Apply sorting and pagination
+        keyset = Keyset(sort_by, REVIEW_SORT_COLUMNS[sort_by], ReviewDB.id, sort_order)
+        items, metadata = await paginate(
+            db,
+            query,
+            page,
+            limit,
+            keyset=keyset,
+            cursor=cursor,
+            total=total,
+            scalars=False,
+        )
 
         if not items and page > 1:
             raise InvalidParameterError(
                 "page", "No reviews found for the specified page"
             )
 
-        return PaginatedReviewsResponse(metadata=metadata, items=items)
+        return rows_response(items, metadata)
+
+    except APIError as e:
+        raise
+    except Exception as e:
+        raise InternalError(f"Unexpected error occurred: {str(e)}")
+
+
+@router.get(
+    "/{product_id}/history",
+    response_model=ProductHistoryResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        404: {"model": ErrorResponse, "description": "Product Not Found"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def get_product_history(
+    product_id: int = Path(..., description="Product ID"),
+    db: AsyncSession = Depends(get_async_db),
+    start: Optional[datetime] = Query(None, description="Start of the range, default 90 days ago"),
+    end: Optional[datetime] = Query(None, description="End of the range, default now"),
+    bucket: str = Query(
+        "auto",
+        description="Downsampling bucket: auto, hour, day, week or month",
+        regex="^(auto|hour|day|week|month)$",
+    ),
+    max_points: int = Query(
+        200, ge=1, le=2000, description="Most points returned when bucket is auto"
+    ),
+):
+    try:
+        end = end or datetime.now()
+        start = start or end - timedelta(days=90)
+        if start >= end:
+            raise InvalidParameterError("start", "Start must be before end")
+
+        product = await db.get(ProductDB, product_id)
+        if not product:
+            raise NotFoundError("Product", product_id)
+
+        if bucket == "auto":
+            bucket = next(
+                (
+                    name
+                    for name, width in HISTORY_BUCKETS.items()
+                    if (end - start) / width <= max_points
+                ),
+                "month",
+            )
+
+        # Snapshots are only written on change, so the value at `start` is
+        # the last one captured before it
+        previous = (
+            await db.execute(
+                select(ProductSnapshotDB)
+                .where(
+                    ProductSnapshotDB.product_id == product_id,
+                    ProductSnapshotDB.captured_at < start,
+                )
+                .order_by(ProductSnapshotDB.captured_at.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        points = []
+        if previous:
+            points.append(
+                HistoryPoint(
+                    time=start,
+                    price=previous.price,
+                    min_price=previous.price,
+                    max_price=previous.price,
+                    average_rating=previous.average_rating,
+                    review_count=previous.review_count,
+                )
+            )
+
+        time = func.date_trunc(bucket, ProductSnapshotDB.captured_at).label("time")
+        rows = await db.execute(
+            select(
+                time,
+                func.avg(ProductSnapshotDB.price).label("price"),
+                func.min(ProductSnapshotDB.price).label("min_price"),
+                func.max(ProductSnapshotDB.price).label("max_price"),
+                func.avg(ProductSnapshotDB.average_rating).label("average_rating"),
+                func.max(ProductSnapshotDB.review_count).label("review_count"),
+                func.min(ProductSnapshotDB.captured_at).label("first_captured_at"),
+            )
+            .where(
+                ProductSnapshotDB.product_id == product_id,
+                ProductSnapshotDB.captured_at >= start,
+                ProductSnapshotDB.captured_at < end,
+            )
+            .group_by(time)
+            .order_by(time)
+        )
+        for row in rows:
+            point = row._asdict()
+            first_captured_at = point.pop("first_captured_at")
+            # The first bucket can begin before `start`, label it `start` so
+            # times only increase. It then replaces the carried point, whose
+            # price held until the bucket's first snapshot.
+            point["time"] = max(point["time"], start)
+            if points and points[-1].time == point["time"]:
+                carried = points.pop()
+                if first_captured_at > start and carried.price is not None:
+                    prices = [carried.price, point["min_price"], point["max_price"]]
+                    prices = [price for price in prices if price is not None]
+                    point["min_price"], point["max_price"] = min(prices), max(prices)
+            points.append(HistoryPoint(**point))
+
+        return ProductHistoryResponse(
+            product_id=product_id, start=start, end=end, bucket=bucket, points=points
+        )
 
     except APIError as e:
         raise
@@ -2,15 +2,21 @@ from datetime import datetime
 from time import perf_counter
 
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from api.routers import analytics
+from api.routers import export
 from api.routers import products
 from api.routers import scheduler
 from api.routers import rag
+from api.routers import metrics
+from api.cache import MemoryBackend, RedisBackend, ResponseCache
 from api.exceptions import APIError
 from api.exceptions import api_error_handler, general_error_handler
 from config import get_config
+from database import get_data_version, init_db
 from main import main
 from scraper.scheduler import job_scheduler
 
@@ -20,20 +26,44 @@ config = get_config()
 app = FastAPI(
     title=config.API_TITLE,
     version=config.API_VERSION,
+    default_response_class=ORJSONResponse,
     swagger_ui_parameters={
         "docExpansion": "none",
         "syntaxHighlight.theme": "obsidian",
     },
 )
 
+app.include_router(analytics.router)
+app.include_router(export.router)
 app.include_router(products.router)
 app.include_router(scheduler.router)
 app.include_router(rag.router)
+app.include_router(metrics.router)
 
 # Register exception handlers on the app
 app.add_exception_handler(APIError, api_error_handler)
 app.add_exception_handler(Exception, general_error_handler)
 
+
+def create_response_cache() -> ResponseCache:
+    if config.API_CACHE_REDIS_URL:
+        backend = RedisBackend(config.API_CACHE_REDIS_URL, config.API_CACHE_TTL_SECONDS)
+    else:
+        backend = MemoryBackend(config.API_CACHE_MAX_ENTRIES, config.API_CACHE_TTL_SECONDS)
+    return ResponseCache(
+        backend,
+        get_data_version,
+        version_poll_seconds=config.API_CACHE_VERSION_POLL_SECONDS,
+    )
+
+
+app.state.response_cache = None
+if config.API_CACHE_ENABLED:
+    app.state.response_cache = create_response_cache()
+    # Registered before CORS, which then wraps it and adds its headers to
+    # cached responses too
+    app.middleware("http")(app.state.response_cache)
+
 origins = ["*"]
 
 app.add_middleware(
@@ -57,6 +87,7 @@ async def add_process_time_header(request: Request, call_next: callable) -> dict
 # Scheduler management
 @app.on_event("startup")
 async def startup_event():
+    init_db()
     try:
         # Add the job to the scheduler
         job_scheduler.add_job(
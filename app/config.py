@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import List
 
 from pydantic_settings import BaseSettings
 
@@ -6,6 +7,11 @@ from pydantic_settings import BaseSettings
 class AppConfigs(BaseSettings):
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
 
     # OpenAI
     OPENAI_API_KEY: str
@@ -14,10 +20,59 @@ class AppConfigs(BaseSettings):
     API_TITLE: str = "Amazon Products Analytics API"
     API_VERSION: str = "0.0.1"
     API_DEBUG: bool = False
+    API_BATCH_MAX_ITEMS: int = 500
+
+    # Response cache of the product listings, keyed on the data version
+    API_CACHE_ENABLED: bool = True
+    API_CACHE_MAX_ENTRIES: int = 1024
+    API_CACHE_TTL_SECONDS: int = 3600
+    API_CACHE_VERSION_POLL_SECONDS: float = 5
+    API_CACHE_REDIS_URL: str = ""  # shared backend, in-process LRU when empty
 
     # Security
     SECRET_KEY: str
 
+    # Scraper
+    SCRAPER_KEYWORDS: List[str] = ["watch"]
+    SCRAPER_FRONTIER: bool = False
+    SCRAPER_ITEM_MAX_RETRIES: int = 3
+    SCRAPER_EXTERNAL_WORKERS: bool = False
+    SCRAPER_LEASE_SECONDS: int = 300
+    SCRAPER_WORKER_POLL_SECONDS: int = 30
+    SCRAPER_BROWSER_CONTEXTS: int = 2
+    SCRAPER_PAGES_PER_CONTEXT: int = 2
+    SCRAPER_MAX_NAVIGATIONS_PER_PAGE: int = 50
+    SCRAPER_READINESS_MODE: str = "selectors"  # selectors, networkidle or fixed
+    SCRAPER_READINESS_TIMEOUT_MS: int = 10000
+    SCRAPER_CONCURRENCY: int = 4
+    SCRAPER_LOAD_BATCH_SIZE: int = 20
+    SCRAPER_RATE_PER_SECOND: float = 0.5
+    SCRAPER_RATE_BURST: float = 2
+    SCRAPER_RATE_MIN_PER_SECOND: float = 0.05
+    SCRAPER_THROTTLE_COOLDOWN_SECONDS: float = 30
+    SCRAPER_MAX_RETRIES: int = 2
+    SCRAPER_HTTP_TIER: bool = False
+    SCRAPER_HTTP_MAX_CONNECTIONS: int = 20
+    SCRAPER_HTTP_REQUIRED_FIELDS: List[str] = ["title", "price"]
+    SCRAPER_INCREMENTAL: bool = False
+    SCRAPER_FRESHNESS_TTL_HOURS: int = 168
+    SCRAPER_PARSER_BACKEND: str = "bs4"  # bs4 or selectolax
+    SCRAPER_PARSER_PROCESSES: int = 0  # 0 parses on the event loop thread
+
+    # Raw HTML archive, disabled when no directory is set
+    SCRAPER_ARCHIVE_DIR: str = ""
+    SCRAPER_ARCHIVE_COMPRESSION: str = "gzip"  # gzip or zstd
+    SCRAPER_ARCHIVE_MAX_BYTES: int = 2 * 1024**3
+    SCRAPER_ARCHIVE_MAX_AGE_DAYS: int = 90
+
+    # Scraper request filtering
+    SCRAPER_BLOCK_RESOURCES: bool = True
+    SCRAPER_BLOCKED_RESOURCE_TYPES: List[str] = ["image", "media", "font"]
+    SCRAPER_ALLOWED_RESOURCE_TYPES: List[str] = []
+    SCRAPER_BLOCKED_URL_PATTERNS: List[str] = []
+    SCRAPER_ALLOWED_URL_PATTERNS: List[str] = []
+    SCRAPER_BLOCK_THIRD_PARTY_SCRIPTS: bool = True
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
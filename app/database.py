@@ -1,20 +1,47 @@
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from pathlib import Path
+import threading
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
 
+from alembic import command as alembic_command
+from alembic.config import Config as AlembicConfig
 from sqlalchemy import (
     create_engine,
+    event,
+    BigInteger,
     Column,
+    Computed,
+    Index,
     Integer,
     String,
     Float,
     DateTime,
     ForeignKey,
+    MetaData,
+    Table,
+    UniqueConstraint,
+    func,
+    insert,
+    literal_column,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+    update,
 )
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import deferred
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from config import get_config
 from api.exceptions import InternalError
@@ -22,8 +49,18 @@ from api.exceptions import InternalError
 
 config = get_config()
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Advisory lock held while migrating, any constant unique to this app
+MIGRATION_LOCK_KEY = 7031
+
 Base = declarative_base()
 
+# Text searched by the fulltext search mode of GET /products
+PRODUCT_SEARCH_VECTOR = (
+    "to_tsvector('english', coalesce(brand, '') || ' ' || "
+    "coalesce(model, '') || ' ' || coalesce(title, ''))"
+)
+
 
 class ProductDB(Base):
     __tablename__ = "products"
@@ -40,9 +77,48 @@ class ProductDB(Base):
     specifications = Column(JSONB)
     image_urls = Column(JSONB)
     created_at = Column(DateTime, default=datetime.now())
+    scraped_at = Column(DateTime, default=datetime.now)
+    # Maintained by Postgres, only loaded when asked for
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(PRODUCT_SEARCH_VECTOR, persisted=True))
+    )
 
     reviews = relationship("ReviewDB", back_populates="product")
 
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        *(
+            Index(
+                f"ix_products_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+            for column in ("brand", "model", "title")
+        ),
+        # Both directions of the keyset orderings of GET /products/
+        Index("ix_products_price_id", price, id),
+        Index("ix_products_price_desc_id", price.desc().nulls_last(), id.desc()),
+        Index("ix_products_average_rating_id", average_rating, id),
+        Index(
+            "ix_products_average_rating_desc_id",
+            average_rating.desc().nulls_last(),
+            id.desc(),
+        ),
+        Index("ix_products_review_count_id", review_count, id),
+        Index(
+            "ix_products_review_count_desc_id",
+            review_count.desc().nulls_last(),
+            id.desc(),
+        ),
+        # GET /products/top
+        Index(
+            "ix_products_top",
+            average_rating.desc().nulls_last(),
+            review_count.desc().nulls_last(),
+        ),
+    )
+
 
 class ReviewDB(Base):
     __tablename__ = "reviews"
@@ -57,64 +133,540 @@ class ReviewDB(Base):
 
     product = relationship("ProductDB", back_populates="reviews")
 
+    __table_args__ = (
+        Index(
+            "ix_reviews_product_id_review_date",
+            product_id,
+            review_date.desc().nulls_last(),
+            id.desc(),
+        ),
+        Index(
+            "ix_reviews_product_id_rating",
+            product_id,
+            rating.desc().nulls_last(),
+            id.desc(),
+        ),
+    )
+
+
+class ProductSnapshotDB(Base):
+    """Tracked values of a product, appended only when one of them changed."""
+
+    __tablename__ = "product_snapshots"
+    __table_args__ = {"postgresql_partition_by": "RANGE (captured_at)"}
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    captured_at = Column(DateTime, primary_key=True)
+    price = Column(Float)
+    average_rating = Column(Float)
+    review_count = Column(Integer)
+
+
+SNAPSHOT_FIELDS = ("price", "average_rating", "review_count")
+
+
+# Materialized views behind /products/analytics, created by migration 0004.
+# They live outside Base.metadata so they are never mistaken for tables.
+analytics_metadata = MetaData()
+
+catalog_summary_view = Table(
+    "mv_catalog_summary",
+    analytics_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("product_count", Integer),
+    Column("brand_count", Integer),
+    Column("average_price", Float),
+    Column("average_rating", Float),
+    Column("review_count", Integer),
+    Column("refreshed_at", DateTime),
+)
+
+brand_stats_view = Table(
+    "mv_brand_stats",
+    analytics_metadata,
+    Column("brand", String, primary_key=True),
+    Column("product_count", Integer),
+    Column("average_price", Float),
+    Column("min_price", Float),
+    Column("max_price", Float),
+    Column("average_rating", Float),
+    Column("review_count", Integer),
+)
+
+rating_distribution_view = Table(
+    "mv_rating_distribution",
+    analytics_metadata,
+    Column("min_rating", Float, primary_key=True),
+    Column("product_count", Integer),
+)
+
+price_buckets_view = Table(
+    "mv_price_buckets",
+    analytics_metadata,
+    Column("min_price", Float, primary_key=True),
+    Column("max_price", Float),
+    Column("product_count", Integer),
+    Column("average_rating", Float),
+)
+
+
+class DataVersionDB(Base):
+    """Single row counter, bumped whenever an ingestion run has loaded new data."""
+
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class CrawlRunDB(Base):
+    __tablename__ = "crawl_runs"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    keywords = Column(JSONB)
+    max_pages = Column(Integer)
+    started_at = Column(DateTime, default=datetime.now)
+    finished_at = Column(DateTime)
+
+
+class CrawlSearchPageDB(Base):
+    __tablename__ = "crawl_search_pages"
+    __table_args__ = (UniqueConstraint("keyword", "page"),)
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    run_id = Column(Integer, ForeignKey("crawl_runs.id"))
+    keyword = Column(String, nullable=False)
+    page = Column(Integer, nullable=False)
+    state = Column(String, nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String)
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class CrawlItemDB(Base):
+    __tablename__ = "crawl_frontier"
+
+    id = Column(Integer, primary_key=True, nullable=False)
+    run_id = Column(Integer, ForeignKey("crawl_runs.id"))
+    asin = Column(String, unique=True, nullable=False)
+    product_url = Column(String, nullable=False)
+    keyword = Column(String)
+    state = Column(String, nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String)
+    lease_owner = Column(String)
+    lease_expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class PoolStats:
+    """Connection checkouts and how long API requests waited for a connection."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record_wait(self, seconds: float):
+        with self.lock:
+            self.waits += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 2)
+            if self.waits
+            else None,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+        }
+
+
+pool_stats = PoolStats()
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+
+def track_pool(engine):
+    @event.listens_for(engine, "checkout")
+    def on_checkout(*args):
+        pool_stats.checkouts += 1
+
+    @event.listens_for(engine, "connect")
+    def on_connect(*args):
+        pool_stats.connects += 1
+
+
+@lru_cache
+def get_engine(db_url: str):
+    """One engine, and so one connection pool, per database URL and process."""
+    engine = create_engine(db_url, **pool_options())
+    track_pool(engine)
+    return engine
+
+
+@lru_cache
+def get_sessionmaker(db_url: str):
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine(db_url))
+
+
+def async_database_url(db_url: str) -> str:
+    """The same database, reached through the asyncpg driver."""
+    return make_url(db_url).set(drivername="postgresql+asyncpg").render_as_string(
+        hide_password=False
+    )
+
+
+@lru_cache
+def get_async_engine(db_url: str):
+    """Async counterpart of get_engine, for the API's request handlers."""
+    engine = create_async_engine(async_database_url(db_url), **pool_options())
+    track_pool(engine.sync_engine)
+    return engine
+
+
+@lru_cache
+def get_async_sessionmaker(db_url: str):
+    # Expiring on commit would make attribute access lazy-load, which
+    # cannot happen implicitly on an async session
+    return async_sessionmaker(
+        get_async_engine(db_url), autoflush=False, expire_on_commit=False
+    )
+
+
+def init_db(db_url: Optional[str] = None):
+    """Bring the schema up to date with the migrations. Run once at startup."""
+    alembic_config = AlembicConfig(str(MIGRATIONS_DIR.parent / "alembic.ini"))
+    alembic_config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    alembic_config.attributes["configure_logger"] = False
+    with get_engine(db_url or config.DATABASE_URL).begin() as connection:
+        # Processes starting together wait for each other instead of racing
+        # through the same migrations; the lock is released at commit
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+        )
+        alembic_config.attributes["connection"] = connection
+        alembic_command.upgrade(alembic_config, "head")
+
+
+def get_pool_stats() -> Dict[str, object]:
+    """Usage of both connection pools, plus checkout counts and API wait times."""
+    pools = {
+        "sync": get_engine(config.DATABASE_URL).pool,
+        "async": get_async_engine(config.DATABASE_URL).pool,
+    }
+    return {
+        **{
+            name: {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+            for name, pool in pools.items()
+        },
+        **pool_stats.summary(),
+    }
+
+
+# Snapshot partitions this process already made sure exist
+_snapshot_partitions = set()
+
 
 class DatabaseManager:
     def __init__(self, db_url: str):
         self.db_url = db_url or config.DATABASE_URL
-        self.engine = create_engine(self.db_url)
-        Base.metadata.create_all(self.engine)
+        self.engine = get_engine(self.db_url)
 
     def get_session(self):
-        return sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        return get_sessionmaker(self.db_url)
 
-    def create_product(self, product_data: dict) -> ProductDB:
+    def upsert_products(self, products: List[dict]) -> Dict[str, int]:
+        """Insert or refresh a batch of products and their reviews in one transaction.
+
+        Products are stamped with their own `scraped_at` when they carry one
+        (e.g. the fetch time of a replayed page), otherwise with the current
+        time, and never overwrite a product scraped more recently; those
+        are counted as skipped. Returns inserted/updated/skipped/failed
+        counts, how many history snapshots were written and the ASINs of
+        the failed products. If the batch statement fails, products are
+        retried one at a time so a bad row only fails itself.
+        """
+        # ON CONFLICT cannot touch the same row twice, keep the last copy
+        products = list({product["asin"]: product for product in products}.values())
+        counts = {
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "snapshots": 0,
+            "failed_asins": [],
+        }
+        if not products:
+            return counts
+        now = datetime.now()
+        products = [
+            {**product, "scraped_at": product.get("scraped_at") or now}
+            for product in products
+        ]
+        for scraped_at in {product["scraped_at"] for product in products}:
+            self.ensure_snapshot_partition(scraped_at)
+        Session = self.get_session()
         try:
-            Session = self.get_session()
             with Session() as session:
-                # Add product data
-                db_product = ProductDB(
-                    **{
-                        k: v
-                        for k, v in product_data.items()
-                        if k not in ["top_reviews"]
-                    }
+                batch_counts = self._upsert_batch(session, products)
+                session.commit()
+                return batch_counts
+        except SQLAlchemyError as e:
+            if len(products) == 1:
+                print(f"Error upserting product {products[0]['asin']}: {e}")
+                return {**counts, "failed": 1, "failed_asins": [products[0]["asin"]]}
+            print(f"Error upserting batch of {len(products)} products, retrying one by one: {e}")
+
+        for product in products:
+            for key, value in self.upsert_products([product]).items():
+                counts[key] += value
+        return counts
+
+    def _upsert_batch(self, session, products: List[dict]) -> Dict[str, int]:
+        rows = [
+            {k: v for k, v in product.items() if k != "top_reviews"}
+            for product in products
+        ]
+        statement = pg_insert(ProductDB).values(rows)
+        columns = set(rows[0]) - {"asin"}
+        statement = statement.on_conflict_do_update(
+            index_elements=["asin"],
+            set_={column: statement.excluded[column] for column in columns},
+            # Older data, e.g. a replayed page, must not replace newer data
+            where=or_(
+                ProductDB.scraped_at.is_(None),
+                ProductDB.scraped_at <= statement.excluded.scraped_at,
+            ),
+        ).returning(
+            ProductDB.id,
+            ProductDB.asin,
+            # xmax is only zero for rows this statement inserted
+            literal_column("xmax = 0").label("inserted"),
+        )
+        result = session.execute(statement).all()
+        product_ids = {row.asin: row.id for row in result}
+        inserted = sum(1 for row in result if row.inserted)
+
+        updated_ids = [row.id for row in result if not row.inserted]
+        if updated_ids:
+            session.query(ReviewDB).filter(
+                ReviewDB.product_id.in_(updated_ids)
+            ).delete(synchronize_session=False)
+
+        reviews = [
+            {
+                "product_id": product_ids[product["asin"]],
+                "reviewer_name": review.get("reviewer_name"),
+                "rating": review.get("rating"),
+                "review_date": review.get("review_date"),
+                "review_text": review.get("review_text"),
+            }
+            for product in products
+            if product["asin"] in product_ids
+            for review in product.get("top_reviews") or []
+        ]
+        if reviews:
+            # executemany, batched into multi-row INSERTs by the driver
+            session.execute(insert(ReviewDB), reviews)
+
+        snapshots = self._write_snapshots(session, list(product_ids.values()))
+
+        return {
+            "inserted": inserted,
+            "updated": len(result) - inserted,
+            "skipped": len(products) - len(result),
+            "failed": 0,
+            "snapshots": snapshots,
+            "failed_asins": [],
+        }
+
+    def _write_snapshots(self, session, product_ids: List[int]) -> int:
+        """Snapshot the products whose tracked values differ from their last snapshot.
+
+        Snapshots are captured at the product's scraped_at, the time its
+        values were fetched.
+        """
+        last = (
+            select(ProductSnapshotDB)
+            .where(ProductSnapshotDB.product_id == ProductDB.id)
+            .order_by(ProductSnapshotDB.captured_at.desc())
+            .limit(1)
+            .lateral("last")
+        )
+        current = tuple_(*(getattr(ProductDB, field) for field in SNAPSHOT_FIELDS))
+        previous = tuple_(*(getattr(last.c, field) for field in SNAPSHOT_FIELDS))
+        changed = (
+            select(
+                ProductDB.id,
+                ProductDB.scraped_at,
+                *(getattr(ProductDB, field) for field in SNAPSHOT_FIELDS),
+            )
+            .outerjoin(last, true())
+            .where(
+                ProductDB.id.in_(product_ids),
+                or_(last.c.product_id.is_(None), current.is_distinct_from(previous)),
+                # A replayed page older than the last snapshot is not history
+                or_(
+                    last.c.captured_at.is_(None),
+                    ProductDB.scraped_at > last.c.captured_at,
+                ),
+            )
+        )
+        statement = insert(ProductSnapshotDB).from_select(
+            ["product_id", "captured_at", *SNAPSHOT_FIELDS], changed
+        )
+        # History is best effort, it must never cost the product data
+        try:
+            with session.begin_nested():
+                return session.execute(statement).rowcount
+        except SQLAlchemyError as e:
+            print(f"Error writing product snapshots: {e}")
+            return 0
+
+    @staticmethod
+    def snapshot_partition(when: datetime) -> Tuple[str, datetime, datetime]:
+        start = datetime(when.year, when.month, 1)
+        end = datetime(when.year + when.month // 12, when.month % 12 + 1, 1)
+        return f"product_snapshots_y{start:%Y}m{start:%m}", start, end
+
+    def ensure_snapshot_partition(self, when: datetime):
+        """Create the monthly partition of product_snapshots that holds `when`."""
+        name, start, end = self.snapshot_partition(when)
+        if name in _snapshot_partitions:
+            return
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF product_snapshots "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    )
                 )
-                session.add(db_product)
-                session.flush()
-
-                # Add review data
-                for review in product_data.get("top_reviews", []):
-                    db_review = ReviewDB(
-                        product_id=db_product.id,
-                        reviewer_name=review.get("reviewer_name"),
-                        rating=review.get("rating"),
-                        review_date=review.get("review_date"),
-                        review_text=review.get("review_text"),
+            _snapshot_partitions.add(name)
+        except SQLAlchemyError as e:
+            print(f"Error creating snapshot partition {name}: {e}")
+
+    def refresh_analytics(self) -> bool:
+        """Recompute the analytics views without blocking their readers."""
+        try:
+            start = perf_counter()
+            with self.engine.begin() as connection:
+                for view in analytics_metadata.sorted_tables:
+                    connection.execute(
+                        text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}")
                     )
-                    session.add(db_review)
+            print(f"Refreshed analytics views in {perf_counter() - start:.2f}s")
+            return True
+        except SQLAlchemyError as e:
+            print(f"Error refreshing analytics views: {e}")
+            return False
 
-                session.commit()
+    def bump_data_version(self) -> Optional[int]:
+        """Mark the catalog as changed, which invalidates the API's response cache."""
+        try:
+            with self.engine.begin() as connection:
+                version = connection.execute(
+                    update(DataVersionDB)
+                    .where(DataVersionDB.id == 1)
+                    .values(version=DataVersionDB.version + 1, updated_at=func.now())
+                    .returning(DataVersionDB.version)
+                ).scalar_one()
+            print(f"Data version is now {version}")
+            return version
         except SQLAlchemyError as e:
-            print(f"Error inserting product data: {e}")
-        return db_product
+            print(f"Error bumping the data version: {e}")
+            return None
+
+    def get_last_scraped(self, asins: List[str]) -> Dict[str, datetime]:
+        """Map each known ASIN to the time it was last scraped, in one query."""
+        if not asins:
+            return {}
+        try:
+            Session = self.get_session()
+            with Session() as session:
+                rows = session.query(
+                    ProductDB.asin,
+                    func.coalesce(ProductDB.scraped_at, ProductDB.created_at),
+                ).filter(ProductDB.asin.in_(asins))
+                return {asin: scraped_at for asin, scraped_at in rows}
+        except SQLAlchemyError as e:
+            print(f"Error getting last scrape times: {e}")
+            return {}
 
     def get_product_by_asin(self, asin: str) -> Optional[ProductDB]:
         try:
             Session = self.get_session()
-            with Session(self.engine) as session:
+            with Session() as session:
                 return session.query(ProductDB).filter(ProductDB.asin == asin).first()
         except SQLAlchemyError as e:
             print(f"Error getting product data: {e}")
 
 
-async def get_db():
-    db_manager = DatabaseManager(None)
-    Session = db_manager.get_session()
+def get_db():
+    Session = get_sessionmaker(config.DATABASE_URL)
     session = Session()
     try:
+        # Check out the connection up front to time the wait for the pool
+        start = perf_counter()
+        try:
+            session.connection()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        pool_stats.record_wait(perf_counter() - start)
         yield session
     except SQLAlchemyError as e:
         session.rollback()
         raise InternalError(str(e))
     finally:
         session.close()
+
+
+async def get_data_version() -> int:
+    Session = get_async_sessionmaker(config.DATABASE_URL)
+    async with Session() as session:
+        return await session.scalar(
+            select(DataVersionDB.version).where(DataVersionDB.id == 1)
+        )
+
+
+async def get_async_db():
+    Session = get_async_sessionmaker(config.DATABASE_URL)
+    async with Session() as session:
+        try:
+            start = perf_counter()
+            try:
+                await session.connection()
+            except PoolTimeoutError:
+                pool_stats.timeouts += 1
+                raise
+            pool_stats.record_wait(perf_counter() - start)
+            yield session
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise InternalError(str(e))
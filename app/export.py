@@ -0,0 +1,264 @@
+"""Bulk export of the catalog, products with their reviews.
+
+Rows are read through a server-side cursor (`yield_per`), one batch at a
+time, so memory stays flat however large the catalog is.
+
+    python export.py --format ndjson --output products.ndjson
+    python export.py --format csv --output products.csv --no-reviews
+    python export.py --format parquet --output products.parquet
+"""
+
+import argparse
+import csv
+from datetime import datetime
+import io
+import json
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from database import DatabaseManager, ProductDB, ReviewDB
+
+
+FORMATS = ("ndjson", "csv", "parquet")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+PRODUCT_FIELDS = (
+    "id",
+    "asin",
+    "product_url",
+    "brand",
+    "model",
+    "title",
+    "price",
+    "average_rating",
+    "review_count",
+    "specifications",
+    "image_urls",
+    "scraped_at",
+)
+
+REVIEW_FIELDS = ("id", "reviewer_name", "rating", "review_date", "review_text")
+
+
+def export_query(include_reviews: bool = True, updated_since: Optional[datetime] = None):
+    """Products in id order, each followed by its reviews when asked for.
+
+    Reviews are joined in rather than loaded per product, so the whole
+    export is one statement and one cursor.
+    """
+    query = select(*(getattr(ProductDB, field) for field in PRODUCT_FIELDS))
+    if include_reviews:
+        query = query.add_columns(
+            *(getattr(ReviewDB, field).label(f"review_{field}") for field in REVIEW_FIELDS)
+        ).outerjoin(ReviewDB, ReviewDB.product_id == ProductDB.id)
+        query = query.order_by(ProductDB.id, ReviewDB.id)
+    else:
+        query = query.order_by(ProductDB.id)
+    if updated_since:
+        query = query.where(ProductDB.scraped_at >= updated_since)
+    return query
+
+
+class ProductAssembler:
+    """Folds the joined rows of `export_query` back into one dict per product."""
+
+    def __init__(self, include_reviews: bool = True):
+        self.include_reviews = include_reviews
+        self.current = None
+
+    def add(self, row) -> Optional[dict]:
+        """Take the next row, return the previous product once it is complete."""
+        mapping = row._mapping
+        finished = None
+        if self.current is None or self.current["id"] != mapping["id"]:
+            finished = self.current
+            self.current = {field: mapping[field] for field in PRODUCT_FIELDS}
+            if self.include_reviews:
+                self.current["reviews"] = []
+        if self.include_reviews and mapping["review_id"] is not None:
+            self.current["reviews"].append(
+                {field: mapping[f"review_{field}"] for field in REVIEW_FIELDS}
+            )
+        return finished
+
+    def finish(self) -> Optional[dict]:
+        finished, self.current = self.current, None
+        return finished
+
+
+def iter_products(
+    session,
+    include_reviews: bool = True,
+    updated_since: Optional[datetime] = None,
+    batch_size: int = 1000,
+) -> Iterator[dict]:
+    query = export_query(include_reviews, updated_since)
+    assembler = ProductAssembler(include_reviews)
+    for row in session.execute(query.execution_options(yield_per=batch_size)):
+        product = assembler.add(row)
+        if product is not None:
+            yield product
+    product = assembler.finish()
+    if product is not None:
+        yield product
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(product: dict) -> str:
+    return json.dumps(product, default=json_default) + "\n"
+
+
+def csv_columns(include_reviews: bool = True) -> List[str]:
+    return list(PRODUCT_FIELDS) + (["reviews"] if include_reviews else [])
+
+
+def csv_header(include_reviews: bool = True) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(csv_columns(include_reviews))
+    return buffer.getvalue()
+
+
+def to_csv(product: dict) -> str:
+    """One CSV line, with the nested fields written as JSON."""
+    row = []
+    for value in product.values():
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value, default=json_default)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        row.append(value)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def parquet_schema(include_reviews: bool = True):
+    import pyarrow as pa
+
+    fields = [
+        ("id", pa.int64()),
+        ("asin", pa.string()),
+        ("product_url", pa.string()),
+        ("brand", pa.string()),
+        ("model", pa.string()),
+        ("title", pa.string()),
+        ("price", pa.float64()),
+        ("average_rating", pa.float64()),
+        ("review_count", pa.int64()),
+        ("specifications", pa.map_(pa.string(), pa.string())),
+        ("image_urls", pa.list_(pa.string())),
+        ("scraped_at", pa.timestamp("us")),
+    ]
+    if include_reviews:
+        review = pa.struct(
+            [
+                ("id", pa.int64()),
+                ("reviewer_name", pa.string()),
+                ("rating", pa.int64()),
+                ("review_date", pa.timestamp("us")),
+                ("review_text", pa.string()),
+            ]
+        )
+        fields.append(("reviews", pa.list_(review)))
+    return pa.schema(fields)
+
+
+def write_parquet(
+    products: Iterable[dict],
+    path: str,
+    include_reviews: bool = True,
+    row_group_size: int = 10000,
+) -> int:
+    """Write `products` to a Parquet file, one row group per `row_group_size` products.
+
+    specifications becomes a map column, image_urls a list column and
+    reviews a list of structs. Returns the number of products written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = parquet_schema(include_reviews)
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for product in products:
+            if product["specifications"] is not None:
+                product["specifications"] = list(product["specifications"].items())
+            batch.append(product)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def export(
+    output_format: str,
+    output: str,
+    include_reviews: bool = True,
+    updated_since: Optional[datetime] = None,
+    batch_size: int = 1000,
+    row_group_size: int = 10000,
+) -> int:
+    """Export the catalog to `output`. Returns the number of products written."""
+    Session = DatabaseManager(None).get_session()
+    with Session() as session:
+        products = iter_products(session, include_reviews, updated_since, batch_size)
+        if output_format == "parquet":
+            return write_parquet(products, output, include_reviews, row_group_size)
+
+        written = 0
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            if output_format == "csv":
+                file.write(csv_header(include_reviews))
+            encode = to_csv if output_format == "csv" else to_ndjson
+            for product in products:
+                file.write(encode(product))
+                written += 1
+        return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export products and their reviews")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--output", required=True, help="File to write")
+    parser.add_argument(
+        "--no-reviews",
+        dest="include_reviews",
+        action="store_false",
+        help="Export products only",
+    )
+    parser.add_argument(
+        "--updated-since",
+        type=datetime.fromisoformat,
+        help="Only products scraped at or after this time",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Rows fetched per cursor round trip"
+    )
+    parser.add_argument(
+        "--row-group-size", type=int, default=10000, help="Products per Parquet row group"
+    )
+    args = parser.parse_args()
+    count = export(
+        args.format,
+        args.output,
+        include_reviews=args.include_reviews,
+        updated_since=args.updated_since,
+        batch_size=args.batch_size,
+        row_group_size=args.row_group_size,
+    )
+    print(f"Exported {count} products to {args.output}")
@@ -0,0 +1,353 @@
+from datetime import datetime, timedelta
+import os
+import socket
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from database import (
+    CrawlItemDB,
+    CrawlRunDB,
+    CrawlSearchPageDB,
+    DatabaseManager,
+)
+from scraper.utils import Utilities
+
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class CrawlFrontier:
+    """Persistent crawl state for many keywords, stored in Postgres.
+
+    A run owns the search pages of its keywords and every product URL they
+    list. Product URLs are deduplicated by ASIN across keywords. Items move
+    from pending to in_flight to done, or back to pending on failure until
+    `max_retries` is reached, after which they stay failed. An unfinished
+    run is resumed where it stopped instead of starting over.
+
+    Claimed work is leased to `worker_id` for `lease_seconds` and rows are
+    claimed with FOR UPDATE SKIP LOCKED, so any number of workers can share
+    a run without scraping a URL twice. Leases are extended by `heartbeat`;
+    work whose lease expired (e.g. its worker died) can be claimed again.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        max_retries: int = 3,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = 300,
+    ):
+        self.db_manager = db_manager
+        self.max_retries = max_retries
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.run_id = None
+
+    def _lease_expiry(self):
+        # Database time, so workers on machines with skewed clocks agree
+        return func.now() + timedelta(seconds=self.lease_seconds)
+
+    @staticmethod
+    def _claimable(table):
+        return or_(
+            table.state == PENDING,
+            and_(
+                table.state == IN_FLIGHT,
+                or_(
+                    table.lease_expires_at.is_(None),
+                    table.lease_expires_at < func.now(),
+                ),
+            ),
+        )
+
+    def start_run(self, keywords: List[str], max_pages: int, resume: bool = True) -> int:
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            run = None
+            if resume:
+                run = session.scalars(
+                    select(CrawlRunDB)
+                    .where(CrawlRunDB.finished_at.is_(None))
+                    .order_by(CrawlRunDB.id.desc())
+                ).first()
+            if run:
+                # Work claimed by an interrupted process is claimed again
+                # once its lease expires
+                print(f"Resuming crawl run {run.id} for keywords {run.keywords}")
+            else:
+                session.execute(
+                    update(CrawlRunDB)
+                    .where(CrawlRunDB.finished_at.is_(None))
+                    .values(finished_at=datetime.now())
+                )
+                run = CrawlRunDB(keywords=keywords, max_pages=max_pages)
+                session.add(run)
+                session.flush()
+                self._add_search_pages(session, run.id, keywords, max_pages)
+            session.commit()
+            self.run_id = run.id
+        return self.run_id
+
+    def join_run(self) -> Optional[int]:
+        """Attach to the latest unfinished run, if there is one."""
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            self.run_id = session.scalar(
+                select(CrawlRunDB.id)
+                .where(CrawlRunDB.finished_at.is_(None))
+                .order_by(CrawlRunDB.id.desc())
+                .limit(1)
+            )
+        return self.run_id
+
+    def _add_search_pages(self, session, run_id: int, keywords: List[str], max_pages: int):
+        rows = [
+            {"run_id": run_id, "keyword": keyword, "page": page, "state": PENDING}
+            for keyword in keywords
+            for page in range(1, max_pages + 1)
+        ]
+        if not rows:
+            return
+        statement = insert(CrawlSearchPageDB).values(rows)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["keyword", "page"],
+                set_={
+                    "run_id": statement.excluded.run_id,
+                    "state": PENDING,
+                    "attempts": 0,
+                    "last_error": None,
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "updated_at": datetime.now(),
+                },
+            )
+        )
+
+    def finish_run(self) -> bool:
+        """Mark the run finished if no work is left. Returns True when finished."""
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            remaining = 0
+            for table in (CrawlSearchPageDB, CrawlItemDB):
+                remaining += session.scalar(
+                    select(func.count())
+                    .select_from(table)
+                    .where(
+                        table.run_id == self.run_id,
+                        table.state.in_([PENDING, IN_FLIGHT]),
+                    )
+                )
+            if remaining:
+                return False
+            session.execute(
+                update(CrawlRunDB)
+                .where(CrawlRunDB.id == self.run_id)
+                .values(finished_at=datetime.now())
+            )
+            session.commit()
+        return True
+
+    def claim_search_page(self) -> Optional[Tuple[int, str, int]]:
+        """Claim the next pending search page as (id, keyword, page)."""
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            page = session.scalars(
+                select(CrawlSearchPageDB)
+                .where(
+                    CrawlSearchPageDB.run_id == self.run_id,
+                    self._claimable(CrawlSearchPageDB),
+                )
+                .order_by(CrawlSearchPageDB.page, CrawlSearchPageDB.keyword)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if page is None:
+                return None
+            page.state = IN_FLIGHT
+            page.lease_owner = self.worker_id
+            page.lease_expires_at = self._lease_expiry()
+            claimed = (page.id, page.keyword, page.page)
+            session.commit()
+        return claimed
+
+    def complete_search_page(
+        self, page_id: int, product_urls: List[str], exhausted: Optional[bool] = None
+    ) -> int:
+        """Store the product URLs found on a search page. Returns how many were new.
+
+        An exhausted page, by default one without product URLs, ends
+        pagination, so the keyword's later pages are marked done as well.
+        Callers that filter the page's URLs pass whether the page itself
+        was empty.
+        """
+        if exhausted is None:
+            exhausted = not product_urls
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            page = session.get(CrawlSearchPageDB, page_id)
+            page.state = DONE
+            page.lease_owner = None
+            page.lease_expires_at = None
+            if exhausted:
+                session.execute(
+                    update(CrawlSearchPageDB)
+                    .where(
+                        CrawlSearchPageDB.run_id == self.run_id,
+                        CrawlSearchPageDB.keyword == page.keyword,
+                        CrawlSearchPageDB.page > page.page,
+                    )
+                    .values(state=DONE)
+                )
+
+            rows = {}
+            for url in product_urls:
+                asin = Utilities.extract_asin(url)
+                if asin and asin not in rows:
+                    rows[asin] = {
+                        "run_id": self.run_id,
+                        "asin": asin,
+                        "product_url": url,
+                        "keyword": page.keyword,
+                        "state": PENDING,
+                    }
+            added = 0
+            if rows:
+                statement = insert(CrawlItemDB).values(list(rows.values()))
+                # Items from an earlier run are queued again, items already
+                # seen in this run (e.g. under another keyword) are left alone
+                statement = statement.on_conflict_do_update(
+                    index_elements=["asin"],
+                    set_={
+                        "run_id": statement.excluded.run_id,
+                        "product_url": statement.excluded.product_url,
+                        "keyword": statement.excluded.keyword,
+                        "state": PENDING,
+                        "attempts": 0,
+                        "last_error": None,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "updated_at": datetime.now(),
+                    },
+                    where=CrawlItemDB.run_id != statement.excluded.run_id,
+                ).returning(CrawlItemDB.id)
+                added = len(session.execute(statement).all())
+            session.commit()
+        return added
+
+    def fail_search_page(self, page_id: int, error: str):
+        self._fail(CrawlSearchPageDB, [page_id], error)
+
+    def claim_items(self, limit: int) -> List[Tuple[int, str]]:
+        """Claim up to `limit` pending product URLs as (id, url) pairs."""
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            claimable = (
+                select(CrawlItemDB.id)
+                .where(CrawlItemDB.run_id == self.run_id, self._claimable(CrawlItemDB))
+                .order_by(CrawlItemDB.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            rows = session.execute(
+                update(CrawlItemDB)
+                .where(CrawlItemDB.id.in_(claimable))
+                .values(
+                    state=IN_FLIGHT,
+                    lease_owner=self.worker_id,
+                    lease_expires_at=self._lease_expiry(),
+                )
+                .returning(CrawlItemDB.id, CrawlItemDB.product_url)
+            ).all()
+            session.commit()
+        return [(item_id, url) for item_id, url in sorted(rows)]
+
+    def complete_items(self, item_ids: List[int]):
+        if not item_ids:
+            return
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            # Items whose lease was lost to another worker are theirs now
+            session.execute(
+                update(CrawlItemDB)
+                .where(
+                    CrawlItemDB.id.in_(item_ids),
+                    CrawlItemDB.lease_owner == self.worker_id,
+                )
+                .values(
+                    state=DONE,
+                    last_error=None,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            session.commit()
+
+    def fail_items(self, item_ids: List[int], error: str):
+        self._fail(CrawlItemDB, item_ids, error)
+
+    def _fail(self, table, ids: List[int], error: str):
+        if not ids:
+            return
+        attempts = table.attempts + 1
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            session.execute(
+                update(table)
+                .where(table.id.in_(ids), table.lease_owner == self.worker_id)
+                .values(
+                    attempts=attempts,
+                    last_error=error[:1000],
+                    state=case((attempts < self.max_retries, PENDING), else_=FAILED),
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            )
+            session.commit()
+
+    def heartbeat(self) -> int:
+        """Extend the leases on this worker's in-flight work. Returns how many."""
+        return self._update_own_leases(lease_expires_at=self._lease_expiry())
+
+    def release(self) -> int:
+        """Hand this worker's unfinished work back to the other workers."""
+        return self._update_own_leases(
+            state=PENDING, lease_owner=None, lease_expires_at=None
+        )
+
+    def _update_own_leases(self, **values) -> int:
+        updated = 0
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            for table in (CrawlSearchPageDB, CrawlItemDB):
+                updated += session.execute(
+                    update(table)
+                    .where(
+                        table.lease_owner == self.worker_id,
+                        table.state == IN_FLIGHT,
+                    )
+                    .values(**values)
+                ).rowcount
+            session.commit()
+        return updated
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        Session = self.db_manager.get_session()
+        with Session() as session:
+            return {
+                table.__tablename__: dict(
+                    session.execute(
+                        select(table.state, func.count())
+                        .where(table.run_id == self.run_id)
+                        .group_by(table.state)
+                    ).all()
+                )
+                for table in (CrawlSearchPageDB, CrawlItemDB)
+            }
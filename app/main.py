@@ -1,11 +1,21 @@
+import argparse
 import asyncio
-import concurrent.futures
+from collections import Counter
+from datetime import datetime, timedelta
 from time import perf_counter
+from typing import List, Optional
 
 from config import get_config
-from database import DatabaseManager
+from database import DatabaseManager, init_db
+from frontier import CrawlFrontier
 from models import Product
-from scraper.amazon_scraper import AmazonScraper
+from scraper.amazon_scraper import AmazonScraper, WebClient
+from scraper.archive import HtmlArchive
+from scraper.crawler import CrawlPipeline
+from scraper.extraction import ProductExtractor
+from scraper.fetcher import HttpClient, TieredFetcher
+from scraper.rate_limiter import AdaptiveRateLimiter, active_limiters
+from scraper.resource_policy import DEFAULT_BLOCKED_URL_PATTERNS, ResourcePolicy
 
 
 config = get_config()
@@ -15,54 +25,289 @@ class DataLoader:
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
 
-    def load_product(self, product_data):
-        try:
-            product = Product(**product_data)
-            return self.db_manager.create_product(product.model_dump())
-        except Exception as e:
-            print(f"Error loading product data: {e}")
-            return None
+    def load_product(self, product_data) -> dict:
+        return self.load_products([product_data])
 
+    def load_products(self, products_data: list) -> dict:
+        """Validate and upsert a batch of products.
+
+        Returns the upsert counts. `failed_asins` also lists the products
+        that failed validation, as None for those without an ASIN.
+        """
+        products = []
+        failed_asins = []
+        for product_data in products_data:
+            try:
+                products.append(Product(**product_data).model_dump())
+            except Exception as e:
+                print(f"Error loading product data: {e}")
+                failed_asins.append(product_data.get("asin") if product_data else None)
+        counts = self.db_manager.upsert_products(products)
+        counts["failed"] += len(failed_asins)
+        counts["failed_asins"] += failed_asins
+        return counts
+
+    def filter_stale_urls(self, urls: List[str], ttl: timedelta) -> List[str]:
+        """Keep URLs whose product is new or was last scraped longer than `ttl` ago."""
+        asins = {url: AmazonScraper.extract_asin(url) for url in urls}
+        last_scraped = self.db_manager.get_last_scraped(
+            [asin for asin in asins.values() if asin]
+        )
+        cutoff = datetime.now() - ttl
+        return [
+            url
+            for url, asin in asins.items()
+            if asin not in last_scraped or last_scraped[asin] < cutoff
+        ]
+
+
+def create_resource_policy() -> Optional[ResourcePolicy]:
+    if not config.SCRAPER_BLOCK_RESOURCES:
+        return None
+    return ResourcePolicy(
+        blocked_resource_types=config.SCRAPER_BLOCKED_RESOURCE_TYPES,
+        allowed_resource_types=config.SCRAPER_ALLOWED_RESOURCE_TYPES or None,
+        blocked_url_patterns=(
+            config.SCRAPER_BLOCKED_URL_PATTERNS or DEFAULT_BLOCKED_URL_PATTERNS
+        ),
+        allowed_url_patterns=config.SCRAPER_ALLOWED_URL_PATTERNS,
+        block_third_party_scripts=config.SCRAPER_BLOCK_THIRD_PARTY_SCRIPTS,
+    )
+
+
+def create_archive() -> Optional[HtmlArchive]:
+    if not config.SCRAPER_ARCHIVE_DIR:
+        return None
+    return HtmlArchive(
+        config.SCRAPER_ARCHIVE_DIR,
+        compression=config.SCRAPER_ARCHIVE_COMPRESSION,
+        max_bytes=config.SCRAPER_ARCHIVE_MAX_BYTES,
+        max_age_days=config.SCRAPER_ARCHIVE_MAX_AGE_DAYS,
+    )
+
+
+def create_extractor() -> ProductExtractor:
+    return ProductExtractor(
+        backend=config.SCRAPER_PARSER_BACKEND,
+        processes=config.SCRAPER_PARSER_PROCESSES,
+    )
+
+
+def create_rate_limiter(tier: str) -> AdaptiveRateLimiter:
+    rate_limiter = AdaptiveRateLimiter(
+        target_rate=config.SCRAPER_RATE_PER_SECOND,
+        burst=config.SCRAPER_RATE_BURST,
+        min_rate=config.SCRAPER_RATE_MIN_PER_SECOND,
+        cooldown=config.SCRAPER_THROTTLE_COOLDOWN_SECONDS,
+    )
+    active_limiters[tier] = rate_limiter
+    return rate_limiter
 
-async def process_product(scraper, loader, url):
-    product_data = await scraper.scrape_product_data(url)
-    if product_data:
-        return loader.load_product(product_data)
 
+def create_scraper() -> AmazonScraper:
+    active_limiters.clear()
+    client = WebClient(
+        pool_contexts=config.SCRAPER_BROWSER_CONTEXTS,
+        pool_pages_per_context=config.SCRAPER_PAGES_PER_CONTEXT,
+        pool_max_navigations=config.SCRAPER_MAX_NAVIGATIONS_PER_PAGE,
+        timeout=config.SCRAPER_READINESS_TIMEOUT_MS,
+        readiness=config.SCRAPER_READINESS_MODE,
+        resource_policy=create_resource_policy(),
+        rate_limiter=create_rate_limiter("browser"),
+        max_retries=config.SCRAPER_MAX_RETRIES,
+    )
+    extractor = create_extractor()
+    fetcher = None
+    if config.SCRAPER_HTTP_TIER:
+        # Plain HTTP is blocked far more often than the browser, its own
+        # limiter keeps those blocks from slowing down the browser fallback
+        http_client = HttpClient(
+            client.user_agents[0],
+            create_rate_limiter("http"),
+            max_connections=config.SCRAPER_HTTP_MAX_CONNECTIONS,
+        )
+        fetcher = TieredFetcher(
+            http_client,
+            client,
+            extractor,
+            required_fields=config.SCRAPER_HTTP_REQUIRED_FIELDS,
+        )
+    return AmazonScraper(client, extractor, create_archive(), fetcher)
 
-def get_product_urls(scraper, keyword, max_pages) -> list:
-    return asyncio.run(scraper.get_product_urls(keyword, max_pages=max_pages))
 
+def create_frontier(db_manager: DatabaseManager) -> CrawlFrontier:
+    return CrawlFrontier(
+        db_manager,
+        max_retries=config.SCRAPER_ITEM_MAX_RETRIES,
+        lease_seconds=config.SCRAPER_LEASE_SECONDS,
+    )
 
-def run_scraper(scraper, loader, url):
-    asyncio.run(process_product(scraper, loader, url))
 
+def create_pipeline(
+    scraper: AmazonScraper,
+    loader: DataLoader,
+    incremental: bool = False,
+    frontier: Optional[CrawlFrontier] = None,
+) -> CrawlPipeline:
+    return CrawlPipeline(
+        scraper,
+        loader,
+        concurrency=config.SCRAPER_CONCURRENCY,
+        batch_size=config.SCRAPER_LOAD_BATCH_SIZE,
+        freshness_ttl=(
+            timedelta(hours=config.SCRAPER_FRESHNESS_TTL_HOURS)
+            if incremental
+            else None
+        ),
+        frontier=frontier,
+        heartbeat_interval=config.SCRAPER_LEASE_SECONDS / 3,
+    )
+
+
+async def crawl(
+    keywords: List[str],
+    max_pages: int,
+    loader: DataLoader,
+    incremental: bool = False,
+    frontier: Optional[CrawlFrontier] = None,
+) -> dict:
+    totals = Counter()
+    async with create_scraper() as scraper:
+        pipeline = create_pipeline(scraper, loader, incremental, frontier)
+        if frontier:
+            # Failed items go back to pending, keep going until they are
+            # done or out of retries
+            while True:
+                stats = await pipeline.run_frontier()
+                totals.update(stats)
+                finished = await asyncio.to_thread(frontier.finish_run)
+                if finished or stats["queued"] == 0:
+                    break
+            print(f"Crawl frontier: {frontier.stats()}")
+        else:
+            for keyword in keywords:
+                totals.update(await pipeline.run(keyword, max_pages))
+
+        print(f"Page readiness: {scraper.client.readiness_summary()}")
+        print(f"Rate limiter: {scraper.client.rate_limiter.metrics()}")
+        if scraper.fetcher:
+            print(f"Fetch tiers: {scraper.fetcher.summary()}")
+        if scraper.client.resource_policy:
+            print(f"Resource filtering: {scraper.client.resource_policy.summary()}")
+        if scraper.archive:
+            removed = await asyncio.to_thread(scraper.archive.evict)
+            print(f"Evicted {removed} pages from the HTML archive")
+    return dict(totals)
+
+
+async def replay(loader: DataLoader) -> dict:
+    """Re-run extraction and loading on the latest archived page of each ASIN."""
+    archive = create_archive()
+    if archive is None:
+        raise ValueError("SCRAPER_ARCHIVE_DIR must be set to replay from the archive")
 
-def run_jobs(urls: list, scraper: callable, loader: callable) -> None:
     start = perf_counter()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-        future_to_url = {
-            executor.submit(run_scraper, scraper, loader, url): url for url in urls
-        }
-        for future in concurrent.futures.as_completed(future_to_url):
-            url = future_to_url[future]
-            try:
-                future.result()
-                print(f"Successfully processed URL: {url}")
-            except Exception as e:
-                print(f"Error during scraping for {url}: {e}")
+    extractor = create_extractor()
+    batch_size = config.SCRAPER_LOAD_BATCH_SIZE
+    stats = {
+        "pages": 0,
+        "inserted": 0,
+        "updated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "snapshots": 0,
+        "failed_asins": [],
+    }
+
+    async def extract(page):
+        html = await asyncio.to_thread(archive.get, page.digest)
+        product = await extractor.extract_product(html, page.url)
+        # The data is as old as the page, not as the replay
+        if product:
+            product["scraped_at"] = page.fetched_at
+        return product
+
+    try:
+        pages = list(archive.latest())
+        for i in range(0, len(pages), batch_size):
+            batch = await asyncio.gather(*map(extract, pages[i : i + batch_size]))
+            stats["pages"] += len(batch)
+            counts = await asyncio.to_thread(loader.load_products, batch)
+            for key, value in counts.items():
+                stats[key] += value
+    finally:
+        extractor.close()
+
     end = perf_counter()
+    print(f"Replay stats: {stats}")
     print(f"Time taken: {(end - start) / 60} minutes")
+    return stats
 
 
-def main(keyword="watch", max_pages=2):
+def main(
+    keyword=None,
+    max_pages=2,
+    replay_archive=False,
+    incremental=None,
+    keywords=None,
+    resume=True,
+):
+    init_db()
     db_manager = DatabaseManager(None)
-    scraper = AmazonScraper()
     loader = DataLoader(db_manager)
+    if incremental is None:
+        incremental = config.SCRAPER_INCREMENTAL
+    keywords = keywords or ([keyword] if keyword else config.SCRAPER_KEYWORDS)
+
+    if replay_archive:
+        asyncio.run(replay(loader))
+        db_manager.refresh_analytics()
+        db_manager.bump_data_version()
+        return
 
-    product_urls = get_product_urls(scraper, keyword, max_pages)
-    run_jobs(product_urls, scraper, loader)
+    frontier = None
+    if config.SCRAPER_FRONTIER:
+        frontier = create_frontier(db_manager)
+        run_id = frontier.start_run(keywords, max_pages, resume=resume)
+        if config.SCRAPER_EXTERNAL_WORKERS:
+            print(f"Crawl run {run_id} queued for the scrape workers")
+            return
+    asyncio.run(crawl(keywords, max_pages, loader, incremental, frontier))
+    db_manager.refresh_analytics()
+    db_manager.bump_data_version()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape Amazon products")
+    parser.add_argument(
+        "--keyword",
+        action="append",
+        dest="keywords",
+        help="Search keyword, can be given several times",
+    )
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Re-extract and load products from the HTML archive, no browser",
+    )
+    parser.add_argument(
+        "--incremental",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Skip products scraped within SCRAPER_FRESHNESS_TTL_HOURS",
+    )
+    parser.add_argument(
+        "--no-resume",
+        dest="resume",
+        action="store_false",
+        help="Start a new frontier run instead of resuming an unfinished one",
+    )
+    args = parser.parse_args()
+    main(
+        max_pages=args.max_pages,
+        replay_archive=args.replay,
+        incremental=args.incremental,
+        keywords=args.keywords,
+        resume=args.resume,
+    )
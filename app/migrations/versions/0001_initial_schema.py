@@ -0,0 +1,151 @@
+"""Initial schema
+
+Databases created by the old create_all bootstrap already have some of
+these tables, so existing tables are left alone and only the columns added
+since then are filled in.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR = (
+    "to_tsvector('english', coalesce(brand, '') || ' ' || "
+    "coalesce(model, '') || ' ' || coalesce(title, ''))"
+)
+
+
+def lease_columns():
+    return [
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String()),
+        sa.Column("lease_owner", sa.String()),
+        sa.Column("lease_expires_at", sa.DateTime()),
+    ]
+
+
+def upgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "products" not in tables:
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("asin", sa.String()),
+            sa.Column("product_url", sa.String()),
+            sa.Column("brand", sa.String()),
+            sa.Column("model", sa.String()),
+            sa.Column("title", sa.String()),
+            sa.Column("price", sa.Float()),
+            sa.Column("average_rating", sa.Float()),
+            sa.Column("review_count", sa.Integer()),
+            sa.Column("specifications", postgresql.JSONB()),
+            sa.Column("image_urls", postgresql.JSONB()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_products_asin", "products", ["asin"], unique=True)
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS scraped_at TIMESTAMP")
+    op.execute(
+        "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_products_search_vector "
+        "ON products USING gin (search_vector)"
+    )
+
+    # Trigram indexes need pg_trgm, which is not installed everywhere
+    available = op.get_bind().scalar(
+        sa.text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+    if available:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in ("brand", "model", "title"):
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_products_{column}_trgm "
+                f"ON products USING gin ({column} gin_trgm_ops)"
+            )
+    else:
+        print("pg_trgm is not available, substring search will scan products")
+
+    if "reviews" not in tables:
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id")),
+            sa.Column("reviewer_name", sa.String()),
+            sa.Column("rating", sa.Integer()),
+            sa.Column("review_date", sa.DateTime()),
+            sa.Column("review_text", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+
+    if "crawl_runs" not in tables:
+        op.create_table(
+            "crawl_runs",
+            sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("keywords", postgresql.JSONB()),
+            sa.Column("max_pages", sa.Integer()),
+            sa.Column("started_at", sa.DateTime()),
+            sa.Column("finished_at", sa.DateTime()),
+        )
+
+    if "crawl_search_pages" not in tables:
+        op.create_table(
+            "crawl_search_pages",
+            sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("run_id", sa.Integer(), sa.ForeignKey("crawl_runs.id")),
+            sa.Column("keyword", sa.String(), nullable=False),
+            sa.Column("page", sa.Integer(), nullable=False),
+            *lease_columns(),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.UniqueConstraint("keyword", "page"),
+        )
+        op.create_index(
+            "ix_crawl_search_pages_state", "crawl_search_pages", ["state"]
+        )
+
+    if "crawl_frontier" not in tables:
+        op.create_table(
+            "crawl_frontier",
+            sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+            sa.Column("run_id", sa.Integer(), sa.ForeignKey("crawl_runs.id")),
+            sa.Column("asin", sa.String(), nullable=False, unique=True),
+            sa.Column("product_url", sa.String(), nullable=False),
+            sa.Column("keyword", sa.String()),
+            *lease_columns(),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_crawl_frontier_state", "crawl_frontier", ["state"])
+
+    for table in ("crawl_search_pages", "crawl_frontier"):
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS lease_owner VARCHAR")
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP"
+        )
+
+
+def downgrade() -> None:
+    for table in (
+        "crawl_frontier",
+        "crawl_search_pages",
+        "crawl_runs",
+        "reviews",
+        "products",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,57 @@
+"""Composite indexes for the products router's filters and orderings
+
+Every listing orders by a sort column with NULLs last and the id as
+tiebreaker (see api/pagination.Keyset). A btree scanned backwards turns
+NULLS LAST into NULLS FIRST, so each product sort column gets an index per
+direction. Reviews are always read for one product and default to newest
+first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    "ix_products_price_id": "products (price, id)",
+    "ix_products_price_desc_id": "products (price DESC NULLS LAST, id DESC)",
+    "ix_products_average_rating_id": "products (average_rating, id)",
+    "ix_products_average_rating_desc_id": (
+        "products (average_rating DESC NULLS LAST, id DESC)"
+    ),
+    "ix_products_review_count_id": "products (review_count, id)",
+    "ix_products_review_count_desc_id": (
+        "products (review_count DESC NULLS LAST, id DESC)"
+    ),
+    "ix_products_top": (
+        "products (average_rating DESC NULLS LAST, review_count DESC NULLS LAST)"
+    ),
+    "ix_reviews_product_id_review_date": (
+        "reviews (product_id, review_date DESC NULLS LAST, id DESC)"
+    ),
+    "ix_reviews_product_id_rating": (
+        "reviews (product_id, rating DESC NULLS LAST, id DESC)"
+    ),
+}
+
+
+def upgrade() -> None:
+    for name, definition in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    op.execute("ANALYZE products")
+    op.execute("ANALYZE reviews")
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,55 @@
+"""Product snapshot history, partitioned by month
+
+Partitions are created on demand by DatabaseManager.ensure_snapshot_partition
+before snapshots are written. Products that already exist get a first
+snapshot of their current values.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE product_snapshots (
+            product_id INTEGER NOT NULL REFERENCES products (id),
+            captured_at TIMESTAMP NOT NULL,
+            price DOUBLE PRECISION,
+            average_rating DOUBLE PRECISION,
+            review_count INTEGER,
+            PRIMARY KEY (product_id, captured_at)
+        ) PARTITION BY RANGE (captured_at)
+        """
+    )
+
+    now = datetime.now()
+    start = datetime(now.year, now.month, 1)
+    end = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+    op.execute(
+        f"CREATE TABLE product_snapshots_y{start:%Y}m{start:%m} "
+        f"PARTITION OF product_snapshots "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    op.execute(
+        f"""
+        INSERT INTO product_snapshots (product_id, captured_at, price, average_rating, review_count)
+        SELECT id, '{now.isoformat()}', price, average_rating, review_count FROM products
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE product_snapshots")
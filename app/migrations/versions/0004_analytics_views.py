@@ -0,0 +1,92 @@
+"""Materialized views behind the /products/analytics endpoints
+
+Each view has a unique index so it can be refreshed CONCURRENTLY, without
+blocking readers, by DatabaseManager.refresh_analytics.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VIEWS = {
+    "mv_catalog_summary": (
+        """
+        SELECT
+            1 AS id,
+            count(*) AS product_count,
+            count(DISTINCT brand) AS brand_count,
+            avg(price) AS average_price,
+            avg(average_rating) AS average_rating,
+            coalesce(sum(review_count), 0) AS review_count,
+            localtimestamp AS refreshed_at
+        FROM products
+        """,
+        "id",
+    ),
+    "mv_brand_stats": (
+        """
+        SELECT
+            coalesce(brand, 'Unknown') AS brand,
+            count(*) AS product_count,
+            avg(price) AS average_price,
+            min(price) AS min_price,
+            max(price) AS max_price,
+            avg(average_rating) AS average_rating,
+            coalesce(sum(review_count), 0) AS review_count
+        FROM products
+        GROUP BY coalesce(brand, 'Unknown')
+        """,
+        "brand",
+    ),
+    "mv_rating_distribution": (
+        """
+        SELECT
+            floor(average_rating * 2) / 2 AS min_rating,
+            count(*) AS product_count
+        FROM products
+        WHERE average_rating IS NOT NULL
+        GROUP BY floor(average_rating * 2) / 2
+        """,
+        "min_rating",
+    ),
+    "mv_price_buckets": (
+        """
+        SELECT
+            bucket.min_price,
+            bucket.max_price,
+            count(*) AS product_count,
+            avg(p.average_rating) AS average_rating
+        FROM products AS p
+        JOIN (
+            VALUES (0, 25), (25, 50), (50, 100), (100, 200),
+                   (200, 500), (500, 1000), (1000, NULL)
+        ) AS bucket (min_price, max_price)
+            ON p.price >= bucket.min_price
+            AND (bucket.max_price IS NULL OR p.price < bucket.max_price)
+        GROUP BY bucket.min_price, bucket.max_price
+        """,
+        "min_price",
+    ),
+}
+
+
+def upgrade() -> None:
+    for name, (query, key) in VIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {name} AS {query}")
+        op.execute(f"CREATE UNIQUE INDEX ix_{name}_{key} ON {name} ({key})")
+
+
+def downgrade() -> None:
+    for name in VIEWS:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {name}")
@@ -0,0 +1,36 @@
+"""Data version, bumped at the end of each ingestion run
+
+The API keys its response cache and ETags on it, so cached product
+listings are dropped as soon as a scrape run has loaded new data.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+        """
+    )
+    op.execute("INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, now())")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS data_version")
@@ -22,3 +22,5 @@ class Product(BaseModel):
     specifications: Optional[dict[str, str]]
     image_urls: Optional[List[str]]
     top_reviews: Optional[List[Review]]
+    # When the page was fetched, the load time if not given
+    scraped_at: Optional[datetime] = None
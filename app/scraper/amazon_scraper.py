@@ -1,26 +1,17 @@
 import asyncio
-from datetime import datetime
-from functools import wraps
-import random
-import re
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
 
-
-def handle_exceptions(func):
-    """Decorator to handle exceptions in extraction methods."""
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except Exception:
-            return None
-
-    return wrapper
+from .archive import HtmlArchive
+from .browser_pool import BrowserPool
+from .extraction import ProductExtractor
+from .fetcher import TieredFetcher
+from .rate_limiter import AdaptiveRateLimiter, ThrottledError, detect_throttle
+from .readiness import PageType, ReadinessStats, READINESS_MODES
+from .resource_policy import ResourcePolicy
+from .utils import handle_exceptions, Utilities
 
 
 class WebClient:
@@ -36,107 +27,228 @@ class WebClient:
         timeout: int = 10000,
         wait_until: str = "domcontentloaded",
         headless: bool = True,
+        pool_contexts: int = 2,
+        pool_pages_per_context: int = 2,
+        pool_max_navigations: int = 50,
+        readiness: str = "selectors",
+        resource_policy: Optional[ResourcePolicy] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        max_retries: int = 2,
     ):
+        if readiness not in READINESS_MODES:
+            raise ValueError(f"readiness must be one of: {', '.join(READINESS_MODES)}")
         self.user_agents = self.USER_AGENTS
         self.ua_rotation = ua_rotation
         self.timeout = timeout
         self.wait_until = wait_until
         self.headless = headless
-        self.browser = None
-        self.page = None
+        self.readiness = readiness
+        self.readiness_stats: Dict[str, ReadinessStats] = {}
+        self.resource_policy = resource_policy
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.pool = BrowserPool(
+            self.user_agents,
+            ua_rotation=ua_rotation,
+            headless=headless,
+            contexts=pool_contexts,
+            pages_per_context=pool_pages_per_context,
+            max_navigations=pool_max_navigations,
+            resource_policy=resource_policy,
+        )
 
     async def initialize_browser(self):
-        playwright = await async_playwright().start()
-        launch_options = {"headless": self.headless}
+        await self.pool.start()
+
+    async def close_browser(self):
+        await self.pool.close()
+
+    async def get_html(self, url: str, page_type: Optional[PageType] = None) -> str:
+        """Fetch a page through the shared rate limiter, retrying when throttled."""
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(url)
+            async with self.pool.page() as page:
+                response = await page.goto(url, wait_until=self.wait_until)
+                await self.wait_until_ready(page, page_type)
+                html_content = await page.content()
+
+            reason = detect_throttle(response.status if response else None, html_content)
+            if reason is None:
+                self.rate_limiter.on_success(url)
+                return html_content
+            self.rate_limiter.on_throttle(url, reason)
+        raise ThrottledError(url, reason)
+
+    async def get_page_source(
+        self, url: str, page_type: Optional[PageType] = None
+    ) -> BeautifulSoup:
+        html_content = await self.get_html(url, page_type)
+        return BeautifulSoup(html_content, "html.parser")
+
+    async def wait_until_ready(self, page, page_type: Optional[PageType] = None):
+        """Wait for the page to be ready, using `timeout` as the ceiling.
+
+        In "selectors" mode the page is ready once all selectors declared by
+        its page type are attached, or once the network is idle, whichever
+        comes first. "networkidle" only waits for the network and "fixed"
+        always waits the full timeout.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        if self.readiness == "fixed":
+            await page.wait_for_timeout(self.timeout)
+            outcome = "fixed"
+        else:
+            waiters = [asyncio.ensure_future(self._wait_for_network_idle(page))]
+            if self.readiness == "selectors" and page_type and page_type.selectors:
+                waiters.append(
+                    asyncio.ensure_future(
+                        self._wait_for_selectors(page, page_type.selectors)
+                    )
+                )
+            outcome = await self._first_ready(waiters, start + self.timeout / 1000)
 
-        self.browser = await playwright.chromium.launch(**launch_options)
-        user_agent = (
-            random.choice(self.user_agents) if self.ua_rotation else self.user_agents[0]
+        elapsed_ms = (loop.time() - start) * 1000
+        name = page_type.name if page_type else "default"
+        self.readiness_stats.setdefault(name, ReadinessStats()).record(
+            elapsed_ms, outcome
         )
-        context = await self.browser.new_context(user_agent=user_agent)
-        self.page = await context.new_page()
 
-    async def close_browser(self):
-        if self.browser:
-            await self.browser.close()
+    async def _first_ready(self, waiters: list, deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        outcome = "timeout"
+        pending = set(waiters)
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            ready = [task.result() for task in done if task.exception() is None]
+            if ready:
+                outcome = ready[0]
+                break
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return outcome
+
+    async def _wait_for_selectors(self, page, selectors: List[str]) -> str:
+        await asyncio.gather(
+            *(
+                page.wait_for_selector(selector, state="attached", timeout=self.timeout)
+                for selector in selectors
+            )
+        )
+        return "selectors"
 
-    async def get_page_source(self, url: str) -> BeautifulSoup:
-        await self.page.goto(url, wait_until=self.wait_until)
-        await self.page.wait_for_timeout(self.timeout)
-        html_content = await self.page.content()
-        return BeautifulSoup(html_content, "html.parser")
+    async def _wait_for_network_idle(self, page) -> str:
+        await page.wait_for_load_state("networkidle", timeout=self.timeout)
+        return "networkidle"
+
+    def readiness_summary(self) -> Dict[str, Dict[str, object]]:
+        return {name: stats.summary() for name, stats in self.readiness_stats.items()}
 
 
 class AmazonScraper:
-    def __init__(self):
-        self.base_url = "https://www.amazon.com"
-        self.client = WebClient()
+    SEARCH_RESULTS_PAGE = PageType("search_results", ["div[data-cy='title-recipe']"])
+    PRODUCT_DETAIL_PAGE = PageType(
+        "product_detail",
+        ["#productTitle", "#corePriceDisplay_desktop_feature_div", "#reviewsMedley"],
+    )
+
+    def __init__(
+        self,
+        client: Optional[WebClient] = None,
+        extractor: Optional[ProductExtractor] = None,
+        archive: Optional[HtmlArchive] = None,
+        fetcher: Optional[TieredFetcher] = None,
+        base_url: str = "https://www.amazon.com",
+    ):
+        self.base_url = base_url
+        self.client = client or WebClient()
+        self.extractor = extractor or ProductExtractor()
+        self.archive = archive
+        self.fetcher = fetcher
+
+    async def __aenter__(self):
+        await self.client.initialize_browser()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.fetcher:
+            await self.fetcher.close()
+        await self.client.close_browser()
+        self.extractor.close()
 
     async def get_product_urls(self, keyword: str, max_pages: int = 10) -> List[str]:
         """Get product URLs based on a search keyword."""
-        await self.client.initialize_browser()
-        search_url = f"{self.base_url}/s?k={keyword.replace(' ', '+')}"
         product_urls = []
+        async for urls in self.iter_product_urls(keyword, max_pages=max_pages):
+            product_urls.extend(urls)
+        print(f"Found {len(product_urls)} product URLs.")
+        return product_urls
 
+    async def iter_product_urls(
+        self, keyword: str, max_pages: int = 10
+    ) -> AsyncIterator[List[str]]:
+        """Yield the new product URLs of each search results page as it loads."""
+        seen = set()
         for page in range(1, max_pages + 1):
-            page_url = f"{search_url}&page={page}"
-            soup = await self.client.get_page_source(page_url)
-            products = soup.find_all("div", {"data-cy": "title-recipe"})
-            if len(products) == 0:
+            urls = await self.get_search_page_urls(keyword, page)
+            if len(urls) == 0:
+                if page == 1:
+                    # An empty first page is almost always a soft block,
+                    # later empty pages are the normal end of pagination
+                    self.client.rate_limiter.on_throttle(self.base_url, "empty_results")
                 print(f"No products found on page {page}. Stopping pagination.")
                 break
-            for product in products:
-                try:
-                    href = product.find("a").get("href").split("/ref=")[0]
-                    if self.extract_asin(href):
-                        product_url = urljoin(self.base_url, href)
-                        product_urls.append(product_url)
-                except Exception as e:
-                    print(f"Error processing product link: {e}")
-
-            # Random delay
-            await asyncio.sleep(random.uniform(1, 3))
+            new_urls = [url for url in dict.fromkeys(urls) if url not in seen]
+            seen.update(new_urls)
+            yield new_urls
 
-        await self.client.close_browser()
-        product_urls = list(set(product_urls))
-        print(f"Found {len(product_urls)} product URLs.")
+    async def get_search_page_urls(self, keyword: str, page: int) -> List[str]:
+        """Get the product URLs listed on one search results page."""
+        search_url = f"{self.base_url}/s?k={keyword.replace(' ', '+')}"
+        page_url = f"{search_url}&page={page}"
+        html = await self.client.get_html(page_url, self.SEARCH_RESULTS_PAGE)
+
+        product_urls = []
+        for href in await self.extractor.extract_search_links(html):
+            href = href.split("/ref=")[0]
+            if self.extract_asin(href):
+                product_urls.append(urljoin(self.base_url, href))
         return product_urls
 
     async def scrape_product_data(self, product_url: str) -> Dict[str, any]:
         """Scrape product data from a given product URL."""
-        await self.client.initialize_browser()
-        soup = await self.client.get_page_source(product_url)
-        await self.client.close_browser()
-
-        # Extract product details
-        asin = self.extract_asin(product_url)
-        title = self.extract_title(soup)
-        price = self.extract_price(soup)
-        rating = self.extract_rating(soup)
-        review_count = self.extract_review_count(soup)
-        top_reviews = self.extract_top_reviews(soup)
-        specs = self.extract_technical_specs(soup)
-        images = self.extract_image_urls(soup)
-
-        return {
-            "asin": asin,
-            "product_url": product_url,
-            "brand": specs.get("Brand, Seller, or Collection Name"),
-            "model": specs.get("Model number"),
-            "title": title,
-            "price": price,
-            "average_rating": rating,
-            "review_count": review_count,
-            "specifications": specs,
-            "image_urls": images,
-            "top_reviews": top_reviews,
-        }
+        if self.fetcher:
+            html, product_data = await self.fetcher.fetch_product(
+                product_url, self.PRODUCT_DETAIL_PAGE
+            )
+        else:
+            html = await self.client.get_html(product_url, self.PRODUCT_DETAIL_PAGE)
+            product_data = await self.extractor.extract_product(html, product_url)
+        if self.archive:
+            await self.archive_page(product_url, html)
+        return product_data
+
+    async def archive_page(self, product_url: str, html: str):
+        try:
+            await asyncio.to_thread(
+                self.archive.put, self.extract_asin(product_url), product_url, html
+            )
+        except Exception as e:
+            print(f"Error archiving page {product_url}: {e}")
 
     @staticmethod
     @handle_exceptions
     def extract_asin(url: str) -> str:
-        match = re.search(r"/dp/([A-Z0-9]{10})", url)
-        return match.group(1)
+        return Utilities.extract_asin(url)
 
     @staticmethod
     @handle_exceptions
@@ -234,32 +346,16 @@ class AmazonScraper:
         return image_urls
 
 
-class Utilities:
-    @staticmethod
-    def filter_image_urls(urls: List[str]) -> List[str]:
-        pattern = r"^https://m\.media\-amazon\.com/images/I/.{,26}\.jpg$"
-        return [url for url in urls if re.match(pattern, url)]
-
-    @staticmethod
-    def clean_image_urls(urls: List[str]) -> List[str]:
-        return [re.sub(r"\._AC_SR\d{2,3},\d{2,3}_\.jpg", ".jpg", url) for url in urls]
-
-    @staticmethod
-    def extract_date(text: str) -> Optional[datetime]:
-        match = re.search(r"on (\w+ \d{1,2}, \d{4})", text)
-        return datetime.strptime(match.group(1), "%B %d, %Y") if match else None
-
-
 async def test_run():
-    scraper = AmazonScraper()
-    product_urls = await scraper.get_product_urls("watch", max_pages=2)
-
-    for i, url in enumerate(product_urls):
-        print(f"Scraping product {i + 1} / {len(product_urls)}")
-        product_data = await scraper.scrape_product_data(url)
-        print(product_data)
-        if i == 2:
-            break
+    async with AmazonScraper() as scraper:
+        product_urls = await scraper.get_product_urls("watch", max_pages=2)
+
+        for i, url in enumerate(product_urls):
+            print(f"Scraping product {i + 1} / {len(product_urls)}")
+            product_data = await scraper.scrape_product_data(url)
+            print(product_data)
+            if i == 2:
+                break
 
 
 if __name__ == "__main__":
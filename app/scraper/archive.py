@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+import gzip
+import hashlib
+from pathlib import Path
+import sqlite3
+from typing import Iterator, Optional
+
+
+COMPRESSIONS = ("gzip", "zstd")
+
+SUFFIXES = {"gzip": "gz", "zstd": "zst"}
+
+
+class ArchivedPage:
+    def __init__(self, asin: str, url: str, digest: str, fetched_at: datetime):
+        self.asin = asin
+        self.url = url
+        self.digest = digest
+        self.fetched_at = fetched_at
+
+
+class HtmlArchive:
+    """Content-addressed, compressed on-disk archive of fetched product pages.
+
+    Page bodies are stored once per SHA-256 digest under `objects/`, and a
+    SQLite index records which ASIN and URL was fetched when. `evict`
+    drops entries older than `max_age_days`, then the least recently
+    fetched bodies until the archive fits in `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        compression: str = "gzip",
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[int] = None,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of: {', '.join(COMPRESSIONS)}")
+        if compression == "zstd":
+            # Fail here rather than on every put, where errors are only logged
+            import zstandard  # noqa: F401
+        self.root = Path(root)
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.sqlite3"
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    id INTEGER PRIMARY KEY,
+                    asin TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    compression TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_pages_asin ON pages (asin, fetched_at)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_digest ON pages (digest)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _object_path(self, digest: str, compression: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.html.{SUFFIXES[compression]}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    @staticmethod
+    def _decompress(data: bytes, compression: str) -> bytes:
+        if compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def put(
+        self, asin: str, url: str, html: str, fetched_at: Optional[datetime] = None
+    ) -> str:
+        """Store a fetched page and return its content digest."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, self.compression)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(self._compress(data))
+            tmp_path.replace(path)
+        fetched_at = fetched_at or datetime.now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO pages (asin, url, digest, compression, size, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    asin,
+                    url,
+                    digest,
+                    self.compression,
+                    path.stat().st_size,
+                    fetched_at.isoformat(),
+                ),
+            )
+        return digest
+
+    def get(self, digest: str) -> str:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT compression FROM pages WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        data = self._object_path(digest, row[0]).read_bytes()
+        return self._decompress(data, row[0]).decode("utf-8")
+
+    def latest(self, since: Optional[datetime] = None) -> Iterator[ArchivedPage]:
+        """Yield the most recent archived page of every ASIN."""
+        query = """
+            SELECT asin, url, digest, MAX(fetched_at)
+            FROM pages
+            WHERE fetched_at >= ?
+            GROUP BY asin
+            ORDER BY asin
+        """
+        since_value = since.isoformat() if since else ""
+        with self._connect() as conn:
+            rows = conn.execute(query, (since_value,)).fetchall()
+        for asin, url, digest, fetched_at in rows:
+            yield ArchivedPage(asin, url, digest, datetime.fromisoformat(fetched_at))
+
+    def evict(self) -> int:
+        """Apply the age and size limits. Returns the number of bodies removed."""
+        with self._connect() as conn:
+            if self.max_age_days is not None:
+                cutoff = datetime.now() - timedelta(days=self.max_age_days)
+                conn.execute(
+                    "DELETE FROM pages WHERE fetched_at < ?", (cutoff.isoformat(),)
+                )
+
+            if self.max_bytes is not None:
+                digests = conn.execute(
+                    """
+                    SELECT digest, MAX(size), MAX(fetched_at) AS last_fetched
+                    FROM pages
+                    GROUP BY digest
+                    ORDER BY last_fetched
+                    """
+                ).fetchall()
+                total = sum(size for _, size, _ in digests)
+                for digest, size, _ in digests:
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM pages WHERE digest = ?", (digest,))
+                    total -= size
+
+            referenced = {
+                row[0] for row in conn.execute("SELECT DISTINCT digest FROM pages")
+            }
+
+        removed = 0
+        # Stored bodies only: the .tmp files of pages still being written
+        # by put are left alone
+        for suffix in SUFFIXES.values():
+            for path in self.objects_dir.glob(f"*/*.html.{suffix}"):
+                if path.name.split(".")[0] not in referenced:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        return removed
@@ -0,0 +1,161 @@
+import asyncio
+from contextlib import asynccontextmanager
+import random
+from typing import List, Optional
+
+from playwright.async_api import async_playwright
+
+from .resource_policy import ResourcePolicy
+
+
+class PooledPage:
+    """A browser page owned by the pool, bound to one context slot."""
+
+    def __init__(self, slot: int, generation: int, page):
+        self.slot = slot
+        self.generation = generation
+        self.page = page
+        self.navigations = 0
+
+
+class BrowserPool:
+    """Long-lived Chromium instance with a fixed set of contexts and pages.
+
+    Pages are checked out per navigation and returned afterwards. A page is
+    replaced when it fails a health check, when the navigation using it
+    raised, or after `max_navigations` uses. Once closed, checkouts raise
+    RuntimeError until the pool is started again.
+    """
+
+    def __init__(
+        self,
+        user_agents: List[str],
+        ua_rotation: bool = False,
+        headless: bool = True,
+        contexts: int = 2,
+        pages_per_context: int = 2,
+        max_navigations: int = 50,
+        resource_policy: Optional[ResourcePolicy] = None,
+    ):
+        self.user_agents = user_agents
+        self.ua_rotation = ua_rotation
+        self.headless = headless
+        self.contexts = contexts
+        self.pages_per_context = pages_per_context
+        self.max_navigations = max_navigations
+        self.resource_policy = resource_policy
+        self.playwright = None
+        self.browser = None
+        self._generation = 0
+        self._contexts = {}
+        self._idle = None
+        self._lock = None
+        self.closed = False
+
+    @property
+    def size(self) -> int:
+        return self.contexts * self.pages_per_context
+
+    @property
+    def started(self) -> bool:
+        return self.browser is not None
+
+    async def start(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.started:
+                return
+            self.closed = False
+            self.playwright = await async_playwright().start()
+            await self._launch_browser()
+            self._idle = asyncio.Queue()
+            for slot in range(self.contexts):
+                context = await self._get_context(slot)
+                for _ in range(self.pages_per_context):
+                    page = await context.new_page()
+                    self._idle.put_nowait(PooledPage(slot, self._generation, page))
+
+    async def close(self):
+        self.closed = True
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                print(f"Error closing browser: {e}")
+        if self.playwright:
+            await self.playwright.stop()
+        self.playwright = None
+        self.browser = None
+        self._contexts = {}
+        self._idle = None
+
+    @asynccontextmanager
+    async def page(self):
+        """Check out a healthy page for a single navigation."""
+        if self.closed:
+            raise RuntimeError("Browser pool is closed")
+        if not self.started:
+            await self.start()
+        pooled = await self._idle.get()
+        failed = False
+        try:
+            if not self._is_healthy(pooled):
+                pooled = await self._recycle(pooled)
+            pooled.navigations += 1
+            yield pooled.page
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            # After close there is no browser to recycle into
+            recycle = failed or pooled.navigations >= self.max_navigations
+            if recycle and not self.closed:
+                try:
+                    pooled = await self._recycle(pooled)
+                except Exception as e:
+                    # Hand the slot back anyway, the next checkout retries
+                    print(f"Error recycling browser page: {e}")
+            if self._idle is not None:
+                self._idle.put_nowait(pooled)
+
+    def _is_healthy(self, pooled: PooledPage) -> bool:
+        return (
+            self.browser is not None
+            and self.browser.is_connected()
+            and pooled.generation == self._generation
+            and not pooled.page.is_closed()
+        )
+
+    async def _recycle(self, pooled: PooledPage) -> PooledPage:
+        try:
+            await pooled.page.close()
+        except Exception:
+            pass
+        async with self._lock:
+            if self.closed:
+                raise RuntimeError("Browser pool is closed")
+            if not self.browser.is_connected():
+                print("Browser disconnected. Relaunching.")
+                await self._launch_browser()
+            context = await self._get_context(pooled.slot)
+            page = await context.new_page()
+        return PooledPage(pooled.slot, self._generation, page)
+
+    async def _launch_browser(self):
+        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        self._generation += 1
+
+    async def _get_context(self, slot: int):
+        generation, context = self._contexts.get(slot, (None, None))
+        if generation != self._generation:
+            user_agent = (
+                random.choice(self.user_agents)
+                if self.ua_rotation
+                else self.user_agents[0]
+            )
+            context = await self.browser.new_context(user_agent=user_agent)
+            if self.resource_policy:
+                await self.resource_policy.attach(context)
+            self._contexts[slot] = (self._generation, context)
+        return context
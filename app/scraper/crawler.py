@@ -0,0 +1,242 @@
+import asyncio
+from datetime import timedelta
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+
+class CrawlPipeline:
+    """Single event loop crawl of search keywords.
+
+    A producer streams product URLs from search result pages into a queue
+    while later pages are still loading. A dispatcher scrapes them with at
+    most `concurrency` products in flight, and a writer hands the scraped
+    products to the loader in batches of `batch_size`, which upserts each
+    batch in one transaction.
+
+    With a `freshness_ttl`, URLs of products scraped more recently than the
+    TTL are dropped before they are queued, using one lookup per search page.
+    With a `frontier`, search pages and product URLs are claimed from and
+    recorded in the persistent crawl frontier so an interrupted crawl can
+    resume where it stopped. Only about `concurrency` product URLs are
+    claimed ahead at a time, leaving the rest to other workers, and leases
+    are renewed every `heartbeat_interval` seconds while work is in flight.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        loader,
+        concurrency: int = 4,
+        batch_size: int = 20,
+        flush_interval: float = 5.0,
+        queue_size: int = 100,
+        freshness_ttl: Optional[timedelta] = None,
+        frontier=None,
+        heartbeat_interval: float = 60.0,
+    ):
+        self.scraper = scraper
+        self.loader = loader
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.freshness_ttl = freshness_ttl
+        self.frontier = frontier
+        self.heartbeat_interval = heartbeat_interval
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {
+            "queued": 0,
+            "skipped_fresh": 0,
+            "scraped": 0,
+            "failed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "load_failed": 0,
+            "snapshots": 0,
+            "batches": 0,
+        }
+
+    async def run(self, keyword: str, max_pages: int) -> Dict[str, int]:
+        """Crawl one keyword, keeping crawl state in memory."""
+        return await self._run(self._produce(keyword, max_pages))
+
+    async def run_frontier(self) -> Dict[str, int]:
+        """Crawl the frontier's current run until no pending work is left."""
+        return await self._run(self._produce_from_frontier())
+
+    async def _run(self, producer) -> Dict[str, int]:
+        self.stats = self._empty_stats()
+        start = perf_counter()
+        self._urls = asyncio.Queue(
+            maxsize=self.concurrency if self.frontier else self.queue_size
+        )
+        results = asyncio.Queue()
+
+        writer = asyncio.create_task(self._write(results))
+        dispatcher = asyncio.create_task(self._dispatch(results))
+        heartbeat = asyncio.create_task(self._heartbeat()) if self.frontier else None
+        try:
+            await producer
+        finally:
+            await self._urls.put(None)
+            await dispatcher
+            await results.put(None)
+            await writer
+            if heartbeat:
+                heartbeat.cancel()
+
+        end = perf_counter()
+        print(f"Crawl stats: {self.stats}")
+        print(f"Time taken: {(end - start) / 60} minutes")
+        return self.stats
+
+    async def _filter_fresh(self, urls: List[str]) -> List[str]:
+        if self.freshness_ttl is None:
+            return urls
+        stale_urls = await asyncio.to_thread(
+            self.loader.filter_stale_urls, urls, self.freshness_ttl
+        )
+        self.stats["skipped_fresh"] += len(urls) - len(stale_urls)
+        return stale_urls
+
+    async def _enqueue(self, items: List[Tuple[Optional[int], str]]):
+        for item in items:
+            await self._urls.put(item)
+            self.stats["queued"] += 1
+
+    async def _produce(self, keyword: str, max_pages: int):
+        try:
+            async for page_urls in self.scraper.iter_product_urls(keyword, max_pages):
+                page_urls = await self._filter_fresh(page_urls)
+                await self._enqueue([(None, url) for url in page_urls])
+        except Exception as e:
+            print(f"Error getting product URLs for '{keyword}': {e}")
+
+    async def _produce_from_frontier(self):
+        # Products left pending by an interrupted run go first
+        await self._enqueue_frontier_items()
+        while True:
+            claimed = await asyncio.to_thread(self.frontier.claim_search_page)
+            if claimed is None:
+                break
+            page_id, keyword, page = claimed
+            try:
+                urls = await self.scraper.get_search_page_urls(keyword, page)
+                # Only a page without results ends pagination, not one whose
+                # products were all scraped recently
+                stale_urls = await self._filter_fresh(urls) if urls else urls
+                await asyncio.to_thread(
+                    self.frontier.complete_search_page,
+                    page_id,
+                    stale_urls,
+                    not urls,
+                )
+            except Exception as e:
+                print(f"Error getting product URLs for '{keyword}' page {page}: {e}")
+                await asyncio.to_thread(self.frontier.fail_search_page, page_id, str(e))
+            await self._enqueue_frontier_items()
+
+    async def _enqueue_frontier_items(self):
+        while True:
+            items = await asyncio.to_thread(self.frontier.claim_items, self.concurrency)
+            if not items:
+                break
+            await self._enqueue(items)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(self.frontier.heartbeat)
+            except Exception as e:
+                print(f"Error renewing frontier leases: {e}")
+
+    async def _dispatch(self, results: asyncio.Queue):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        while True:
+            item = await self._urls.get()
+            if item is None:
+                break
+            await semaphore.acquire()
+            task = asyncio.create_task(self._scrape(item, results, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+
+    async def _scrape(
+        self,
+        item: Tuple[Optional[int], str],
+        results: asyncio.Queue,
+        semaphore: asyncio.Semaphore,
+    ):
+        item_id, url = item
+        try:
+            product_data = await self.scraper.scrape_product_data(url)
+            if product_data:
+                self.stats["scraped"] += 1
+                await results.put((item_id, product_data))
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Error during scraping for {url}: {e}")
+            if self.frontier and item_id is not None:
+                await asyncio.to_thread(self.frontier.fail_items, [item_id], str(e))
+        finally:
+            semaphore.release()
+
+    async def _write(self, results: asyncio.Queue):
+        batch = []
+        while True:
+            try:
+                result = await asyncio.wait_for(
+                    results.get(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                # Flush partial batches when products trickle in slowly
+                await self._flush(batch)
+                batch = []
+                continue
+            if result is None:
+                break
+            batch.append(result)
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Optional[int], dict]]):
+        if not batch:
+            return
+        item_ids = [item_id for item_id, _ in batch if item_id is not None]
+        try:
+            # Database writes are blocking, keep them off the event loop
+            counts = await asyncio.to_thread(
+                self.loader.load_products, [data for _, data in batch]
+            )
+            self.stats["inserted"] += counts["inserted"]
+            self.stats["updated"] += counts["updated"]
+            self.stats["load_failed"] += counts["failed"]
+            self.stats["snapshots"] += counts["snapshots"]
+            self.stats["batches"] += 1
+            if self.frontier:
+                # Products that failed validation or their upsert stay retryable
+                failed_asins = set(counts["failed_asins"])
+                failed_ids = [
+                    item_id
+                    for item_id, data in batch
+                    if item_id is not None and data.get("asin") in failed_asins
+                ]
+                done_ids = [
+                    item_id for item_id in item_ids if item_id not in failed_ids
+                ]
+                await asyncio.to_thread(
+                    self.frontier.fail_items, failed_ids, "Product could not be loaded"
+                )
+                await asyncio.to_thread(self.frontier.complete_items, done_ids)
+        except Exception as e:
+            print(f"Error loading batch of {len(batch)} products: {e}")
+            if self.frontier:
+                await asyncio.to_thread(self.frontier.fail_items, item_ids, str(e))
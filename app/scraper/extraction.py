@@ -0,0 +1,318 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from .utils import Utilities
+
+
+# Parser backends
+
+
+class ParserBackend:
+    """Minimal tree API the field specs are evaluated against."""
+
+    name = None
+
+    def parse(self, html: str):
+        raise NotImplementedError
+
+    def select_one(self, node, selector: str):
+        raise NotImplementedError
+
+    def select(self, node, selector: str) -> list:
+        raise NotImplementedError
+
+    def text(self, node, separator: str = "", strip: bool = True) -> str:
+        raise NotImplementedError
+
+    def attr(self, node, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(ParserBackend):
+    name = "bs4"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, "html.parser")
+
+    def select_one(self, node, selector: str):
+        return node.select_one(selector)
+
+    def select(self, node, selector: str) -> list:
+        return node.select(selector)
+
+    def text(self, node, separator: str = "", strip: bool = True) -> str:
+        return node.get_text(separator, strip=strip)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class SelectolaxBackend(ParserBackend):
+    """C-based parser (Lexbor engine), several times faster than html.parser."""
+
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser
+        except ImportError as e:
+            raise ImportError(
+                "The selectolax parser backend requires the selectolax package"
+            ) from e
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str):
+        return self._parser(html)
+
+    def select_one(self, node, selector: str):
+        return node.css_first(selector)
+
+    def select(self, node, selector: str) -> list:
+        return node.css(selector)
+
+    def text(self, node, separator: str = "", strip: bool = True) -> str:
+        if not strip:
+            return node.text(deep=True, separator=separator, strip=False)
+        # Match BeautifulSoup: strip every text node and drop the empty ones
+        parts = node.text(deep=True, separator="\x1f", strip=False).split("\x1f")
+        return separator.join(part.strip() for part in parts if part.strip())
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+
+BACKENDS = {
+    BeautifulSoupBackend.name: BeautifulSoupBackend,
+    SelectolaxBackend.name: SelectolaxBackend,
+}
+
+_backend_cache: Dict[str, ParserBackend] = {}
+
+
+def get_backend(name: str) -> ParserBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Parser backend must be one of: {', '.join(BACKENDS)}")
+    if name not in _backend_cache:
+        _backend_cache[name] = BACKENDS[name]()
+    return _backend_cache[name]
+
+
+# Declarative field specs
+
+
+class Field:
+    """Extraction rule for one output field.
+
+    `value` is "text" (stripped), "raw_text" or "attr:<name>". With `many`
+    every match is extracted into a list; with `children` each match is
+    turned into a dict of sub-fields. Items whose children fail are dropped
+    when `skip_invalid` is set, otherwise the whole field falls back to
+    `default`. `transform` is applied to the final value.
+    """
+
+    def __init__(
+        self,
+        selector: str,
+        value: str = "text",
+        separator: str = "",
+        transform: Optional[Callable[[Any], Any]] = None,
+        many: bool = False,
+        children: Optional[Dict[str, "Field"]] = None,
+        skip_invalid: bool = False,
+        default: Any = None,
+    ):
+        self.selector = selector
+        self.value = value
+        self.separator = separator
+        self.transform = transform
+        self.many = many
+        self.children = children
+        self.skip_invalid = skip_invalid
+        self.default = default
+
+    def extract(self, backend: ParserBackend, root) -> Any:
+        try:
+            return self._extract(backend, root)
+        except Exception:
+            return self.default() if callable(self.default) else self.default
+
+    def _extract(self, backend: ParserBackend, root) -> Any:
+        if self.many:
+            value = []
+            for node in backend.select(root, self.selector):
+                try:
+                    value.append(self._node_value(backend, node))
+                except Exception:
+                    if not self.skip_invalid:
+                        raise
+        else:
+            value = self._node_value(backend, backend.select_one(root, self.selector))
+        return self.transform(value) if self.transform else value
+
+    def _node_value(self, backend: ParserBackend, node) -> Any:
+        if self.children:
+            return {
+                name: child._extract(backend, node)
+                for name, child in self.children.items()
+            }
+        if self.value == "text":
+            return backend.text(node, self.separator, strip=True)
+        if self.value == "raw_text":
+            return backend.text(node, self.separator, strip=False)
+        if self.value.startswith("attr:"):
+            return backend.attr(node, self.value[len("attr:") :])
+        raise ValueError(f"Unknown field value type: {self.value}")
+
+
+def parse_price(text: str) -> float:
+    return float(text.replace(",", "").replace("$", ""))
+
+
+def parse_review_count(text: str) -> int:
+    return int(text.split(" ")[0].replace(",", ""))
+
+
+def parse_star_rating(text: str) -> int:
+    return int(float(text.replace("out of 5 stars", "").strip()))
+
+
+def clean_image_urls(urls: List[str]) -> List[str]:
+    return Utilities.clean_image_urls(Utilities.filter_image_urls(urls))
+
+
+PRODUCT_FIELDS = {
+    "title": Field("#productTitle"),
+    "price": Field(
+        '#corePriceDisplay_desktop_feature_div span[aria-hidden="true"]',
+        transform=parse_price,
+    ),
+    "average_rating": Field(
+        # Exact class string, like the legacy find(class_="a-size-base a-color-base")
+        '#acrPopover span[class="a-size-base a-color-base"]', transform=float
+    ),
+    "review_count": Field("#acrCustomerReviewText", transform=parse_review_count),
+    "specifications": Field(
+        "table#technicalSpecifications_section_1 tr",
+        many=True,
+        children={"key": Field("th"), "value": Field("td", separator=" ")},
+        transform=lambda rows: {row["key"]: row["value"] for row in rows},
+        default=dict,
+    ),
+    "image_urls": Field(
+        "#altImages img",
+        value="attr:src",
+        many=True,
+        transform=clean_image_urls,
+        default=list,
+    ),
+    "top_reviews": Field(
+        'div[data-hook="review"]',
+        many=True,
+        children={
+            "name": Field("span.a-profile-name"),
+            "rating": Field(
+                'i[data-hook="review-star-rating"]',
+                value="raw_text",
+                transform=parse_star_rating,
+            ),
+            "date": Field(
+                'span[data-hook="review-date"]',
+                value="raw_text",
+                transform=Utilities.extract_date,
+            ),
+            "text": Field('span[data-hook="review-body"]'),
+        },
+        skip_invalid=True,
+        default=list,
+    ),
+}
+
+SEARCH_RESULT_FIELDS = {
+    "links": Field(
+        'div[data-cy="title-recipe"]',
+        many=True,
+        children={"href": Field("a", value="attr:href")},
+        skip_invalid=True,
+        default=list,
+    ),
+}
+
+
+def extract_fields(
+    html: str, fields: Dict[str, Field], backend_name: str = "bs4"
+) -> Dict[str, Any]:
+    """Parse the page once and evaluate every field spec against the tree."""
+    backend = get_backend(backend_name)
+    root = backend.parse(html)
+    return {name: field.extract(backend, root) for name, field in fields.items()}
+
+
+def extract_product(
+    html: str, product_url: str, backend_name: str = "bs4"
+) -> Dict[str, Any]:
+    """Extract a product detail page into the dict shape the loader expects."""
+    fields = extract_fields(html, PRODUCT_FIELDS, backend_name)
+    specs = fields["specifications"]
+    return {
+        "asin": Utilities.extract_asin(product_url),
+        "product_url": product_url,
+        "brand": specs.get("Brand, Seller, or Collection Name"),
+        "model": specs.get("Model number"),
+        "title": fields["title"],
+        "price": fields["price"],
+        "average_rating": fields["average_rating"],
+        "review_count": fields["review_count"],
+        "specifications": specs,
+        "image_urls": fields["image_urls"],
+        "top_reviews": fields["top_reviews"],
+    }
+
+
+def extract_search_links(html: str, backend_name: str = "bs4") -> List[str]:
+    """Extract the product links listed on a search results page."""
+    links = extract_fields(html, SEARCH_RESULT_FIELDS, backend_name)["links"]
+    return [link["href"] for link in links if link["href"]]
+
+
+class ProductExtractor:
+    """Runs page extraction inline or in a process pool.
+
+    With `processes` > 0 parsing happens in worker processes so it never
+    stalls page navigation on the event loop.
+    """
+
+    def __init__(self, backend: str = "bs4", processes: int = 0):
+        get_backend(backend)
+        self.backend = backend
+        self.processes = processes
+        self._executor = None
+        self.parse_count = 0
+        self.parse_seconds = 0.0
+
+    async def _run(self, func: Callable, *args):
+        start = perf_counter()
+        if self.processes > 0:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, func, *args)
+        else:
+            result = func(*args)
+        self.parse_count += 1
+        self.parse_seconds += perf_counter() - start
+        return result
+
+    async def extract_product(self, html: str, product_url: str) -> Dict[str, Any]:
+        return await self._run(extract_product, html, product_url, self.backend)
+
+    async def extract_search_links(self, html: str) -> List[str]:
+        return await self._run(extract_search_links, html, self.backend)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,129 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from .extraction import ProductExtractor
+from .rate_limiter import AdaptiveRateLimiter, ThrottledError, detect_throttle
+from .readiness import PageType
+
+
+class HttpClient:
+    """Pooled async HTTP client with keep-alive and HTTP/2 for plain page fetches."""
+
+    def __init__(
+        self,
+        user_agent: str,
+        rate_limiter: AdaptiveRateLimiter,
+        timeout: float = 15.0,
+        max_connections: int = 20,
+        http2: bool = True,
+    ):
+        self.user_agent = user_agent
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.http2 = http2
+        self._client = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_html(self, url: str) -> str:
+        await self.start()
+        await self.rate_limiter.acquire(url)
+        response = await self._client.get(url)
+        reason = detect_throttle(response.status_code, response.text)
+        if reason:
+            self.rate_limiter.on_throttle(url, reason)
+            raise ThrottledError(url, reason)
+        response.raise_for_status()
+        self.rate_limiter.on_success(url)
+        return response.text
+
+
+class TieredFetcher:
+    """Fetches product pages over plain HTTP first, with a browser fallback.
+
+    The browser is only used when the HTTP fetch fails or when any of
+    `required_fields` is missing from what was extracted. The HTTP client
+    should have a rate limiter of its own: blocks of plain HTTP fetches
+    are fallback reasons, not a reason to slow down the browser.
+    """
+
+    def __init__(
+        self,
+        http_client: HttpClient,
+        web_client,
+        extractor: ProductExtractor,
+        required_fields: Iterable[str] = ("title", "price"),
+    ):
+        self.http_client = http_client
+        self.web_client = web_client
+        self.extractor = extractor
+        self.required_fields = tuple(required_fields)
+        self.hits = Counter()
+        self.fallbacks = Counter()
+
+    def missing_fields(self, product_data: Dict[str, Any]) -> list:
+        return [
+            field
+            for field in self.required_fields
+            if product_data.get(field) in (None, "", [], {})
+        ]
+
+    async def fetch_product(
+        self, url: str, page_type: Optional[PageType] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Return the page HTML and the product extracted from it."""
+        try:
+            html = await self.http_client.get_html(url)
+            product_data = await self.extractor.extract_product(html, url)
+            missing = self.missing_fields(product_data)
+            if not missing:
+                self.hits["http"] += 1
+                return html, product_data
+            self.fallbacks.update(f"missing_{field}" for field in missing)
+        except ThrottledError as e:
+            self.fallbacks[e.reason] += 1
+        except Exception as e:
+            print(f"HTTP fetch failed for {url}: {e}")
+            self.fallbacks["error"] += 1
+
+        html = await self.web_client.get_html(url, page_type)
+        product_data = await self.extractor.extract_product(html, url)
+        self.hits["browser"] += 1
+        return html, product_data
+
+    async def close(self):
+        await self.http_client.close()
+
+    def summary(self) -> Dict[str, object]:
+        total = sum(self.hits.values())
+        return {
+            "products": total,
+            "http_hits": self.hits["http"],
+            "browser_hits": self.hits["browser"],
+            "http_hit_rate": round(self.hits["http"] / total, 3) if total else None,
+            "fallback_reasons": dict(self.fallbacks),
+            "http_rate_limiter": self.http_client.rate_limiter.metrics(),
+        }
@@ -0,0 +1,151 @@
+import asyncio
+from collections import Counter
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+
+CAPTCHA_MARKERS = (
+    "/errors/validateCaptcha",
+    "Type the characters you see in this image",
+    "Enter the characters you see below",
+)
+
+
+class ThrottledError(Exception):
+    """Raised when a host keeps throttling a URL after all retries."""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"Throttled ({reason}) fetching {url}")
+        self.url = url
+        self.reason = reason
+
+
+def detect_throttle(status: Optional[int], html: str) -> Optional[str]:
+    """Return the throttle reason for a response, or None if it looks fine."""
+    if status in (429, 503):
+        return f"http_{status}"
+    if any(marker in html for marker in CAPTCHA_MARKERS):
+        return "captcha"
+    return None
+
+
+class HostBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = now
+        self.backoff_until = 0.0
+        self.consecutive_throttles = 0
+        self.requests = 0
+        self.throttle_events = Counter()
+        self.lock = asyncio.Lock()
+
+
+class AdaptiveRateLimiter:
+    """Per-host token bucket whose rate adapts with AIMD.
+
+    A throttle signal (captcha page, 429/503, empty results) multiplies
+    the host's rate by `decrease_factor` and pauses it for an exponentially
+    growing cooldown. Further signals during that cooldown belong to the
+    same event and are only counted. Every successful fetch adds
+    `increase` requests/sec back until the rate is at `target_rate` again.
+    `clock` is the monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        target_rate: float = 0.5,
+        burst: float = 2,
+        min_rate: float = 0.05,
+        increase: float = 0.05,
+        decrease_factor: float = 0.5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.target_rate = target_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._buckets: Dict[str, HostBucket] = {}
+
+    def _bucket(self, url: str) -> HostBucket:
+        host = urlparse(url).hostname or ""
+        if host not in self._buckets:
+            self._buckets[host] = HostBucket(self.target_rate, self.burst, self.clock())
+        return self._buckets[host]
+
+    async def acquire(self, url: str):
+        """Wait until the host of `url` may be requested again."""
+        bucket = self._bucket(url)
+        async with bucket.lock:
+            while True:
+                now = self.clock()
+                if bucket.backoff_until > now:
+                    await asyncio.sleep(bucket.backoff_until - now)
+                    continue
+                bucket.tokens = min(
+                    self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate
+                )
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    bucket.requests += 1
+                    return
+                await asyncio.sleep((1 - bucket.tokens) / bucket.rate)
+
+    def on_success(self, url: str):
+        bucket = self._bucket(url)
+        bucket.consecutive_throttles = 0
+        bucket.rate = min(self.target_rate, bucket.rate + self.increase)
+
+    def on_throttle(self, url: str, reason: str):
+        bucket = self._bucket(url)
+        bucket.throttle_events[reason] += 1
+        # Requests in flight when the host started throttling report the
+        # same congestion event, it only decreases the rate once
+        if self.clock() < bucket.backoff_until:
+            return
+        bucket.consecutive_throttles += 1
+        bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+        bucket.tokens = 0
+        cooldown = min(
+            self.max_cooldown,
+            self.cooldown * 2 ** (bucket.consecutive_throttles - 1),
+        )
+        bucket.backoff_until = self.clock() + cooldown
+        print(
+            f"Throttled by {urlparse(url).hostname} ({reason}). "
+            f"Rate now {bucket.rate:.3f}/s, pausing {cooldown:.0f}s."
+        )
+
+    def metrics(self) -> Dict[str, Dict[str, object]]:
+        now = self.clock()
+        return {
+            host: {
+                "rate": round(bucket.rate, 3),
+                "target_rate": self.target_rate,
+                "state": (
+                    "backoff"
+                    if bucket.backoff_until > now or bucket.rate < self.target_rate
+                    else "normal"
+                ),
+                "requests": bucket.requests,
+                "throttle_events": dict(bucket.throttle_events),
+            }
+            for host, bucket in self._buckets.items()
+        }
+
+
+# The limiters of the latest crawl in this process, by fetch tier, so the API
+# can report them while the crawl runs
+active_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def get_rate_limiter_metrics() -> Dict[str, object]:
+    return {name: limiter.metrics() for name, limiter in active_limiters.items()}
@@ -0,0 +1,47 @@
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+
+READINESS_MODES = ("selectors", "networkidle", "fixed")
+
+
+class PageType:
+    """A kind of page and the selectors that must be present before parsing."""
+
+    def __init__(self, name: str, selectors: List[str]):
+        self.name = name
+        self.selectors = selectors
+
+
+class ReadinessStats:
+    """Rolling record of how long pages of one type took to become ready."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.outcomes = Counter()
+        self.samples = deque(maxlen=max_samples)
+
+    def record(self, elapsed_ms: float, outcome: str):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.outcomes[outcome] += 1
+        self.samples.append(elapsed_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 1),
+            "outcomes": dict(self.outcomes),
+        }
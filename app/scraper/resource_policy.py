@@ -0,0 +1,129 @@
+from collections import Counter
+import re
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+
+DEFAULT_BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    r"amazon-adsystem\.com",
+    r"doubleclick\.net",
+    r"googlesyndication\.com",
+    r"/ads?/",
+    r"/beacon",
+    r"fls-na\.amazon\.com",
+    r"unagi\.amazon\.com",
+)
+
+FIRST_PARTY_DOMAINS = (
+    "amazon.com",
+    "media-amazon.com",
+    "ssl-images-amazon.com",
+    "images-amazon.com",
+)
+
+# Blocked requests are never downloaded, so their size can only be estimated
+ESTIMATED_BYTES_PER_TYPE = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 50_000,
+    "script": 60_000,
+    "stylesheet": 30_000,
+}
+
+
+class ResourcePolicy:
+    """Decides which browser requests are fetched, applied via route interception.
+
+    Rules are checked in order: allowed URL patterns, blocked URL patterns,
+    the allowed resource types (when given, anything else is blocked), the
+    blocked resource types and finally third-party scripts. Documents are
+    never blocked.
+    """
+
+    def __init__(
+        self,
+        blocked_resource_types: Iterable[str] = DEFAULT_BLOCKED_RESOURCE_TYPES,
+        allowed_resource_types: Optional[Iterable[str]] = None,
+        blocked_url_patterns: Iterable[str] = DEFAULT_BLOCKED_URL_PATTERNS,
+        allowed_url_patterns: Iterable[str] = (),
+        block_third_party_scripts: bool = True,
+        first_party_domains: Iterable[str] = FIRST_PARTY_DOMAINS,
+    ):
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.allowed_resource_types = (
+            set(allowed_resource_types) if allowed_resource_types else None
+        )
+        self.blocked_url_patterns = [re.compile(p) for p in blocked_url_patterns]
+        self.allowed_url_patterns = [re.compile(p) for p in allowed_url_patterns]
+        self.block_third_party_scripts = block_third_party_scripts
+        self.first_party_domains = tuple(first_party_domains)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.allowed_requests = Counter()
+        self.blocked_requests = Counter()
+        self.allowed_bytes = Counter()
+        self.estimated_blocked_bytes = Counter()
+
+    def is_first_party(self, url: str) -> bool:
+        host = urlparse(url).hostname or ""
+        return any(
+            host == domain or host.endswith(f".{domain}")
+            for domain in self.first_party_domains
+        )
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type == "document":
+            return False
+        if any(p.search(url) for p in self.allowed_url_patterns):
+            return False
+        if any(p.search(url) for p in self.blocked_url_patterns):
+            return True
+        if (
+            self.allowed_resource_types is not None
+            and resource_type not in self.allowed_resource_types
+        ):
+            return True
+        if resource_type in self.blocked_resource_types:
+            return True
+        if self.block_third_party_scripts and resource_type == "script":
+            return not self.is_first_party(url)
+        return False
+
+    async def handle_route(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked_requests[request.resource_type] += 1
+            self.estimated_blocked_bytes[
+                request.resource_type
+            ] += ESTIMATED_BYTES_PER_TYPE.get(request.resource_type, 0)
+            await route.abort()
+        else:
+            self.allowed_requests[request.resource_type] += 1
+            await route.continue_()
+
+    async def handle_request_finished(self, request):
+        try:
+            sizes = await request.sizes()
+            self.allowed_bytes[request.resource_type] += (
+                sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            )
+        except Exception:
+            # The page or context may already be closed
+            pass
+
+    async def attach(self, context):
+        await context.route("**/*", self.handle_route)
+        context.on("requestfinished", self.handle_request_finished)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "allowed_requests": sum(self.allowed_requests.values()),
+            "blocked_requests": sum(self.blocked_requests.values()),
+            "allowed_bytes": sum(self.allowed_bytes.values()),
+            "estimated_blocked_bytes": sum(self.estimated_blocked_bytes.values()),
+            "blocked_by_type": dict(self.blocked_requests),
+            "allowed_bytes_by_type": dict(self.allowed_bytes),
+        }
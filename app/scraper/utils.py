@@ -0,0 +1,39 @@
+from datetime import datetime
+from functools import wraps
+import re
+from typing import List, Optional
+
+
+def handle_exceptions(func):
+    """Decorator to handle exceptions in extraction methods."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            return None
+
+    return wrapper
+
+
+class Utilities:
+    @staticmethod
+    @handle_exceptions
+    def extract_asin(url: str) -> Optional[str]:
+        match = re.search(r"/dp/([A-Z0-9]{10})", url)
+        return match.group(1)
+
+    @staticmethod
+    def filter_image_urls(urls: List[str]) -> List[str]:
+        pattern = r"^https://m\.media\-amazon\.com/images/I/.{,26}\.jpg$"
+        return [url for url in urls if re.match(pattern, url)]
+
+    @staticmethod
+    def clean_image_urls(urls: List[str]) -> List[str]:
+        return [re.sub(r"\._AC_SR\d{2,3},\d{2,3}_\.jpg", ".jpg", url) for url in urls]
+
+    @staticmethod
+    def extract_date(text: str) -> Optional[datetime]:
+        match = re.search(r"on (\w+ \d{1,2}, \d{4})", text)
+        return datetime.strptime(match.group(1), "%B %d, %Y") if match else None
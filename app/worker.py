@@ -0,0 +1,104 @@
+"""Standalone scrape worker.
+
+Any number of workers, on one machine or many, can run against the same
+database. They claim search pages and product URLs from the crawl frontier
+under leases, so a URL is only scraped by one worker at a time, and work
+left behind by a dead worker is picked up once its lease expires.
+
+    python worker.py                    # work on the open crawl run
+    python worker.py --keyword watch    # start or join a run first
+    python worker.py --once             # exit when no work is left
+"""
+
+import argparse
+import asyncio
+import signal
+from typing import List, Optional
+
+from config import get_config
+from database import DatabaseManager, init_db
+from frontier import CrawlFrontier
+from main import DataLoader, create_frontier, create_pipeline, create_scraper
+
+
+config = get_config()
+
+
+async def work(
+    frontier: CrawlFrontier,
+    loader: DataLoader,
+    incremental: bool = False,
+    once: bool = False,
+):
+    async with create_scraper() as scraper:
+        pipeline = create_pipeline(scraper, loader, incremental, frontier)
+        try:
+            while True:
+                run_id = await asyncio.to_thread(frontier.join_run)
+                if run_id is not None:
+                    stats = await pipeline.run_frontier()
+                    if stats["queued"]:
+                        continue
+                    if await asyncio.to_thread(frontier.finish_run):
+                        print(f"Crawl run {run_id} finished: {frontier.stats()}")
+                        await asyncio.to_thread(loader.db_manager.refresh_analytics)
+                        await asyncio.to_thread(loader.db_manager.bump_data_version)
+                        continue
+                    # What is left is leased by other workers
+                if once:
+                    break
+                await asyncio.sleep(config.SCRAPER_WORKER_POLL_SECONDS)
+        finally:
+            released = await asyncio.to_thread(frontier.release)
+            if released:
+                print(f"Released {released} unfinished work items")
+
+
+async def run_worker(
+    keywords: Optional[List[str]] = None,
+    max_pages: int = 2,
+    incremental: Optional[bool] = None,
+    once: bool = False,
+):
+    await asyncio.to_thread(init_db)
+    db_manager = DatabaseManager(None)
+    frontier = create_frontier(db_manager)
+    if incremental is None:
+        incremental = config.SCRAPER_INCREMENTAL
+    if keywords:
+        await asyncio.to_thread(frontier.start_run, keywords, max_pages)
+
+    # Stop on SIGTERM like on Ctrl-C: finish what is in flight, release the rest
+    task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+    print(f"Worker {frontier.worker_id} started")
+    try:
+        await work(frontier, DataLoader(db_manager), incremental, once)
+    except asyncio.CancelledError:
+        print(f"Worker {frontier.worker_id} stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a scrape worker")
+    parser.add_argument(
+        "--keyword",
+        action="append",
+        dest="keywords",
+        help="Start or join a crawl run for this keyword, can be given several times",
+    )
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument(
+        "--incremental",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Skip products scraped within SCRAPER_FRESHNESS_TTL_HOURS",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Exit when there is no work left"
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_worker(args.keywords, args.max_pages, args.incremental, args.once))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,156 @@
+"""Serialization benchmark for a page of GET /products/.
+
+Serves the same synthetic page through two FastAPI endpoints and times
+full requests against each:
+
+- models: ORM-like objects wrapped in PaginatedProductsResponse with
+  from_attributes, then validated again against the response_model and
+  encoded with the stdlib JSON encoder, which is how the router used to
+  answer.
+- rows: plain rows turned into dicts and encoded by orjson, as
+  rows_response does now.
+
+No database is needed, the rows are generated in memory, so the timings
+leave out ORM hydration, which the rows path also avoids.
+
+    python benchmarks/api/run_benchmark.py --items 100 --spec-keys 40
+"""
+
+import argparse
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+from time import perf_counter
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "app"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.pagination import rows_response  # noqa: E402
+from api.response_models import (  # noqa: E402
+    PaginatedMetadata,
+    PaginatedProductsResponse,
+    ProductResponse,
+)
+
+
+class Row(dict):
+    """Stands in for a SQLAlchemy Row, which rows_response reads with _asdict."""
+
+    def _asdict(self) -> dict:
+        return self
+
+
+def make_rows(items: int, spec_keys: int, images: int) -> list:
+    rows = []
+    for i in range(1, items + 1):
+        rows.append(
+            Row(
+                id=i,
+                asin=f"B{i:09d}",
+                product_url=f"https://www.amazon.com/dp/B{i:09d}",
+                brand=random.choice(["Casio", "Seiko", "Citizen", "Timex"]),
+                model=f"M-{i}",
+                title=f"Analog Watch {i} with Stainless Steel Band " * 2,
+                price=round(random.uniform(10, 1000), 2),
+                average_rating=round(random.uniform(1, 5), 1),
+                review_count=random.randint(0, 20000),
+                specifications={
+                    f"Specification {key}": f"Value of specification {key} " * 3
+                    for key in range(spec_keys)
+                },
+                image_urls=[
+                    f"https://m.media-amazon.com/images/I/{i}-{image}._AC_SL1500_.jpg"
+                    for image in range(images)
+                ],
+            )
+        )
+    return rows
+
+
+def create_app(rows: list) -> FastAPI:
+    metadata = PaginatedMetadata(
+        total=10000,
+        page=1,
+        limit=len(rows),
+        total_pages=100,
+        has_next=True,
+        has_previous=False,
+    )
+    objects = [SimpleNamespace(**row) for row in rows]
+    app = FastAPI()
+
+    @app.get("/models", response_model=PaginatedProductsResponse)
+    async def serve_models():
+        return PaginatedProductsResponse(metadata=metadata, items=objects)
+
+    @app.get(
+        "/rows",
+        response_model=PaginatedProductsResponse,
+        response_class=ORJSONResponse,
+    )
+    async def serve_rows():
+        return rows_response(rows, metadata)
+
+    return app
+
+
+def measure(client: TestClient, path: str, repeat: int) -> dict:
+    client.get(path)
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        response = client.get(path)
+        timings.append((perf_counter() - start) * 1000)
+    response.raise_for_status()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(sorted(timings)[int(0.95 * (len(timings) - 1))], 3),
+        "bytes": len(response.content),
+        "body": response.json(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Product response serialization benchmark")
+    parser.add_argument("--items", type=int, default=100, help="Products per page")
+    parser.add_argument("--spec-keys", type=int, default=40)
+    parser.add_argument("--images", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    random.seed(0)
+    rows = make_rows(args.items, args.spec_keys, args.images)
+    client = TestClient(create_app(rows))
+    results = {path: measure(client, f"/{path}", args.repeat) for path in ("models", "rows")}
+
+    # Both paths must answer with the same document
+    models_items = results["models"].pop("body")["items"]
+    rows_items = results["rows"].pop("body")["items"]
+    assert [ProductResponse(**item) for item in models_items] == [
+        ProductResponse(**item) for item in rows_items
+    ]
+    results["speedup"] = round(
+        results["models"]["median_ms"] / results["rows"]["median_ms"], 2
+    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for path in ("models", "rows"):
+        result = results[path]
+        print(
+            f"{path:<8} median {result['median_ms']:>8.3f} ms  "
+            f"p95 {result['p95_ms']:>8.3f} ms  {result['bytes']} bytes"
+        )
+    print(f"rows is {results['speedup']}x faster than models")
+
+
+if __name__ == "__main__":
+    main()
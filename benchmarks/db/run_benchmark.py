@@ -0,0 +1,183 @@
+"""Query plan and timing benchmark for the products router's access paths.
+
+Seeds a scratch database with a large synthetic catalog, then runs the
+router's listing queries with EXPLAIN ANALYZE at migration 0001 (no listing
+indexes) and again at head, and reports the plan shape and median time of
+each. Use an empty database, it is migrated and filled by the benchmark.
+The migrations load the app's models, so run it with the app's environment
+(.env) available:
+
+    createdb products_bench
+    python benchmarks/db/run_benchmark.py \\
+        --database-url postgresql://postgres@localhost/products_bench \\
+        --products 200000 --reviews-per-product 8
+"""
+
+import argparse
+import json
+from pathlib import Path
+import statistics
+import sys
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+
+SEED_PRODUCTS = """
+INSERT INTO products (
+    asin, product_url, brand, model, title, price, average_rating,
+    review_count, created_at, scraped_at
+)
+SELECT
+    'B' || lpad(i::text, 9, '0'),
+    'https://www.amazon.com/dp/B' || lpad(i::text, 9, '0'),
+    (ARRAY['Casio', 'Seiko', 'Citizen', 'Timex', 'Fossil', 'Garmin', 'Orient'])[1 + i % 7],
+    'M-' || i,
+    'Analog Watch ' || i,
+    -- A few products without a price or rating, like real listings
+    CASE WHEN i % 50 = 0 THEN NULL ELSE round((10 + random() * 990)::numeric, 2) END,
+    CASE WHEN i % 40 = 0 THEN NULL ELSE round((1 + random() * 4)::numeric, 1) END,
+    (random() * 20000)::int,
+    now(),
+    now()
+FROM generate_series(1, :products) AS i
+"""
+
+SEED_REVIEWS = """
+INSERT INTO reviews (product_id, reviewer_name, rating, review_date, review_text, created_at)
+SELECT
+    p.id,
+    'Reviewer ' || r,
+    1 + (random() * 4)::int,
+    now() - (random() * 1000)::int * interval '1 day',
+    'Keeps good time.',
+    now()
+FROM products AS p, generate_series(1, :reviews) AS r
+"""
+
+# The statements the products router issues, with typical parameters
+QUERIES = {
+    "price_range_sorted": (
+        "SELECT * FROM products WHERE price >= 100 AND price <= 300 "
+        "ORDER BY price ASC NULLS LAST, id ASC LIMIT 11"
+    ),
+    "price_desc": (
+        "SELECT * FROM products ORDER BY price DESC NULLS LAST, id DESC LIMIT 11"
+    ),
+    "rating_desc_cursor": (
+        "SELECT * FROM products WHERE (average_rating, id) < (4.0, :product_id) "
+        "ORDER BY average_rating DESC NULLS LAST, id DESC LIMIT 11"
+    ),
+    "review_count_offset_deep": (
+        "SELECT * FROM products ORDER BY review_count ASC NULLS LAST, id ASC "
+        "LIMIT 11 OFFSET 5000"
+    ),
+    "top_products": (
+        "SELECT * FROM products WHERE review_count >= 5 "
+        "ORDER BY average_rating DESC NULLS LAST, review_count DESC NULLS LAST LIMIT 10"
+    ),
+    "top_products_reviews": (
+        "SELECT p.id, r.* FROM products AS p JOIN LATERAL ("
+        "SELECT * FROM reviews WHERE product_id = p.id "
+        "ORDER BY review_date DESC NULLS LAST, id DESC LIMIT 5) AS r ON true "
+        "WHERE p.id IN (:product_id, :product_id + 1, :product_id + 2)"
+    ),
+    "product_reviews": (
+        "SELECT * FROM reviews WHERE product_id = :product_id "
+        "ORDER BY review_date DESC NULLS LAST, id DESC LIMIT 11"
+    ),
+    "product_reviews_count": (
+        "SELECT count(*) FROM reviews WHERE product_id = :product_id"
+    ),
+}
+
+
+def alembic_config(database_url: str) -> Config:
+    config = Config(str(APP_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(APP_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    return config
+
+
+def plan_nodes(plan: dict) -> list:
+    """Node types of a plan tree, with the index used where there is one."""
+    node = plan["Node Type"]
+    if "Index Name" in plan:
+        node += f" ({plan['Index Name']})"
+    nodes = [node]
+    for child in plan.get("Plans", []):
+        nodes += plan_nodes(child)
+    return nodes
+
+
+def measure(engine, repeat: int, params: dict) -> dict:
+    results = {}
+    with engine.connect() as connection:
+        for name, query in QUERIES.items():
+            timings = []
+            for _ in range(repeat):
+                plan = connection.execute(
+                    text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}"), params
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                timings.append(plan[0]["Execution Time"])
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "plan": plan_nodes(plan[0]["Plan"]),
+            }
+    return results
+
+
+def seed(engine, products: int, reviews: int):
+    with engine.begin() as connection:
+        existing = connection.execute(text("SELECT count(*) FROM products")).scalar()
+        if existing:
+            return existing
+        print(f"Seeding {products} products with {reviews} reviews each...")
+        connection.execute(text(SEED_PRODUCTS), {"products": products})
+        connection.execute(text(SEED_REVIEWS), {"reviews": reviews})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE products"))
+        connection.execute(text("VACUUM ANALYZE reviews"))
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Products query benchmark")
+    parser.add_argument("--database-url", required=True, help="Scratch database")
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--reviews-per-product", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    config = alembic_config(args.database_url)
+
+    command.upgrade(config, "0001")
+    command.downgrade(config, "0001")
+    rows = seed(engine, args.products, args.reviews_per_product)
+    params = {"product_id": rows // 2}
+
+    report = {"products": rows, "before": measure(engine, args.repeat, params)}
+    command.upgrade(config, "head")
+    report["after"] = measure(engine, args.repeat, params)
+
+    if args.json:
+        print(json.dumps(report))
+        return
+    print(f"{rows} products")
+    for name in QUERIES:
+        before, after = report["before"][name], report["after"][name]
+        print(f"\n{name}: {before['median_ms']} ms -> {after['median_ms']} ms")
+        print(f"  before: {' > '.join(before['plan'])}")
+        print(f"  after:  {' > '.join(after['plan'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Local Amazon-like HTTP server serving search and product fixture pages.
+
+Pages are rendered from the templates in `fixtures/` so they match the
+selectors AmazonScraper relies on. Every response is delayed by
+`latency` +/- `jitter` seconds to imitate a remote site.
+"""
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import random
+import re
+from string import Template
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+BRANDS = ["Casio", "Seiko", "Citizen", "Timex", "Fossil", "Garmin", "Orient"]
+REVIEWERS = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley"]
+MONTHS = ["January", "March", "May", "July", "September", "November"]
+
+
+def load_template(name: str) -> Template:
+    return Template((FIXTURES_DIR / name).read_text())
+
+
+class FixtureCatalog:
+    """Deterministic fake catalog: `pages` search pages of `per_page` products."""
+
+    def __init__(
+        self,
+        pages: int = 5,
+        per_page: int = 20,
+        reviews: int = 8,
+        images: int = 7,
+        padding_kb: int = 300,
+    ):
+        self.pages = pages
+        self.per_page = per_page
+        self.reviews = reviews
+        self.images = images
+        self.padding = self._padding(padding_kb)
+        self.search_template = load_template("search.html")
+        self.result_template = load_template("search_result.html")
+        self.product_template = load_template("product.html")
+        self.review_template = load_template("review.html")
+
+    @staticmethod
+    def _padding(padding_kb: int) -> str:
+        # Real pages carry hundreds of KB of markup the extractors never read
+        block = '<div class="a-section a-spacing-none filler"><span>lorem ipsum</span></div>\n'
+        return block * (padding_kb * 1024 // len(block))
+
+    @staticmethod
+    def asin(index: int) -> str:
+        return f"B{index:09d}"
+
+    def product_fields(self, index: int) -> dict:
+        rng = random.Random(index)
+        brand = BRANDS[index % len(BRANDS)]
+        return {
+            "asin": self.asin(index),
+            "brand": brand,
+            "model": f"{brand[:2].upper()}-{index:04d}",
+            "title": f"{brand} Men's Analog Watch {index}",
+            "slug": f"{brand}-Mens-Analog-Watch-{index}",
+            "price": f"{rng.uniform(20, 900):,.2f}",
+            "rating": f"{rng.uniform(3, 5):.1f}",
+            "review_count": f"{rng.randint(5, 25000):,}",
+            "image_id": f"{index:02d}abcdEFGH",
+        }
+
+    def render_search(self, keyword: str, page: int) -> str:
+        results = []
+        if 1 <= page <= self.pages:
+            for position in range(self.per_page):
+                index = (page - 1) * self.per_page + position
+                results.append(
+                    self.result_template.substitute(
+                        self.product_fields(index),
+                        keyword=keyword,
+                        position=position + 1,
+                    )
+                )
+        return self.search_template.substitute(
+            keyword=keyword, results="\n".join(results), padding=self.padding
+        )
+
+    def render_product(self, asin: str) -> str:
+        index = int(asin[1:])
+        fields = self.product_fields(index)
+        rng = random.Random(index)
+        images = "\n".join(
+            f'        <li class="a-spacing-small item imageThumbnail"><img alt="" '
+            f'src="https://m.media-amazon.com/images/I/{index:02d}img{i}x._AC_SR38,50_.jpg"></li>'
+            for i in range(self.images)
+        )
+        reviews = "\n".join(
+            self.review_template.substitute(
+                review_id=f"{index:06d}{i:02d}",
+                name=REVIEWERS[(index + i) % len(REVIEWERS)],
+                stars=rng.randint(1, 5),
+                date=f"{MONTHS[i % len(MONTHS)]} {rng.randint(1, 28)}, 2024",
+                text="Keeps good time and looks great. " * rng.randint(1, 6),
+            )
+            for i in range(self.reviews)
+        )
+        return self.product_template.substitute(
+            fields, images=images, reviews=reviews, padding=self.padding
+        )
+
+
+def make_handler(catalog: FixtureCatalog, latency: float, jitter: float):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            delay = latency + random.uniform(-jitter, jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            product = re.search(r"/dp/([A-Z0-9]{10})", url.path)
+            if url.path == "/s":
+                body = catalog.render_search(
+                    query.get("k", [""])[0], int(query.get("page", ["1"])[0])
+                )
+            elif product:
+                body = catalog.render_product(product.group(1))
+            else:
+                self.send_error(404)
+                return
+
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+class FixtureServer:
+    """Runs the fixture site in a background thread."""
+
+    def __init__(
+        self,
+        catalog: FixtureCatalog,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+    ):
+        self.httpd = ThreadingHTTPServer(
+            (host, port), make_handler(catalog, latency, jitter)
+        )
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = FixtureCatalog(pages=args.pages, per_page=args.per_page)
+    server = FixtureServer(
+        catalog, port=args.port, latency=args.latency, jitter=args.jitter
+    )
+    print(f"Serving fixtures on {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,182 @@
+"""End-to-end scraper benchmark against the local fixture server.
+
+Drives AmazonScraper.get_product_urls and scrape_product_data against
+FixtureServer and reports pages/sec, p50/p95 per-product latency, parse
+time and peak RSS (including browser processes when psutil is installed).
+
+    python benchmarks/scraper/run_benchmark.py --max-pages 3 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import resource
+import sys
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "app"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixture_server import FixtureCatalog, FixtureServer  # noqa: E402
+from scraper.amazon_scraper import AmazonScraper, WebClient  # noqa: E402
+from scraper.extraction import ProductExtractor  # noqa: E402
+from scraper.fetcher import HttpClient, TieredFetcher  # noqa: E402
+from scraper.rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from scraper.resource_policy import ResourcePolicy  # noqa: E402
+
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def current_rss() -> int:
+    """RSS in bytes of this process and its children (the browser)."""
+    if psutil is None:
+        return 0
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total
+
+
+async def sample_peak_rss(peak: dict, interval: float = 0.2):
+    while True:
+        peak["rss"] = max(peak["rss"], current_rss())
+        await asyncio.sleep(interval)
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def build_scraper(args, base_url: str) -> AmazonScraper:
+    # Pace far above what the fixture server can serve, so the benchmark
+    # measures the scraper rather than the rate limiter
+    def rate_limiter():
+        return AdaptiveRateLimiter(target_rate=args.rate, burst=args.rate)
+
+    client = WebClient(
+        timeout=args.readiness_timeout,
+        readiness=args.readiness,
+        pool_contexts=args.pool_contexts,
+        pool_pages_per_context=args.pages_per_context,
+        resource_policy=ResourcePolicy(first_party_domains=["127.0.0.1"]),
+        rate_limiter=rate_limiter(),
+    )
+    extractor = ProductExtractor(backend=args.parser, processes=args.parser_processes)
+    fetcher = None
+    if args.http_tier:
+        fetcher = TieredFetcher(
+            HttpClient(client.user_agents[0], rate_limiter(), http2=False),
+            client,
+            extractor,
+        )
+    return AmazonScraper(client, extractor, fetcher=fetcher, base_url=base_url)
+
+
+async def run(args, base_url: str) -> dict:
+    peak = {"rss": 0}
+    sampler = asyncio.create_task(sample_peak_rss(peak))
+    latencies = []
+    failures = 0
+
+    start = perf_counter()
+    async with build_scraper(args, base_url) as scraper:
+        search_start = perf_counter()
+        urls = await scraper.get_product_urls("watch", max_pages=args.max_pages)
+        search_seconds = perf_counter() - search_start
+        if args.products:
+            urls = urls[: args.products]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def scrape(url):
+            nonlocal failures
+            async with semaphore:
+                page_start = perf_counter()
+                try:
+                    product = await scraper.scrape_product_data(url)
+                    if not product.get("title"):
+                        failures += 1
+                except Exception as e:
+                    print(f"Error scraping {url}: {e}")
+                    failures += 1
+                latencies.append(perf_counter() - page_start)
+
+        await asyncio.gather(*map(scrape, urls))
+        elapsed = perf_counter() - start
+        extractor = scraper.extractor
+        readiness = scraper.client.readiness_summary()
+        tiers = scraper.fetcher.summary() if scraper.fetcher else None
+
+    sampler.cancel()
+    pages = args.max_pages + len(urls)
+    return {
+        "pages": pages,
+        "products": len(urls),
+        "failures": failures,
+        "elapsed_s": round(elapsed, 2),
+        "pages_per_sec": round(pages / elapsed, 2),
+        "search_s": round(search_seconds, 2),
+        "product_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "product_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "parse_avg_ms": round(
+            extractor.parse_seconds / max(extractor.parse_count, 1) * 1000, 2
+        ),
+        "parse_total_s": round(extractor.parse_seconds, 2),
+        "peak_rss_mb": round(peak["rss"] / 1024**2, 1) if psutil else None,
+        "peak_rss_self_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+        "readiness": readiness,
+        "fetch_tiers": tiers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark")
+    parser.add_argument("--max-pages", type=int, default=2)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--products", type=int, default=0, help="0 scrapes all")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--pool-contexts", type=int, default=2)
+    parser.add_argument("--pages-per-context", type=int, default=2)
+    parser.add_argument("--parser", default="bs4", choices=["bs4", "selectolax"])
+    parser.add_argument("--parser-processes", type=int, default=0)
+    parser.add_argument(
+        "--readiness", default="selectors", choices=["selectors", "networkidle", "fixed"]
+    )
+    parser.add_argument("--readiness-timeout", type=int, default=10000)
+    parser.add_argument("--http-tier", action="store_true")
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--padding-kb", type=int, default=300)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON only")
+    args = parser.parse_args()
+
+    catalog = FixtureCatalog(
+        pages=args.max_pages, per_page=args.per_page, padding_kb=args.padding_kb
+    )
+    with FixtureServer(catalog, latency=args.latency, jitter=args.jitter) as server:
+        report = asyncio.run(run(args, server.base_url))
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
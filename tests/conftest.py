@@ -0,0 +1,6 @@
+import os
+
+# Settings the app requires at import time. Nothing in the tests connects
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/amazon_products_test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SECRET_KEY", "test")
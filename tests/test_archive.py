@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from scraper.archive import HtmlArchive  # noqa: E402
+
+
+def test_evict_keeps_pages_still_being_written(tmp_path):
+    archive = HtmlArchive(str(tmp_path), max_age_days=30)
+    old = archive.put(
+        "B000000001",
+        "https://www.amazon.com/dp/B000000001",
+        "<html>old</html>",
+        fetched_at=datetime.now() - timedelta(days=31),
+    )
+    kept = archive.put(
+        "B000000002", "https://www.amazon.com/dp/B000000002", "<html>new</html>"
+    )
+    # What put leaves behind until its rename, for a page being written
+    writing = archive._object_path("ab" * 32, "gzip").with_suffix(".tmp")
+    writing.parent.mkdir(exist_ok=True)
+    writing.write_bytes(b"partial")
+
+    assert archive.evict() == 1
+
+    assert not archive._object_path(old, "gzip").exists()
+    assert archive.get(kept) == "<html>new</html>"
+    assert writing.exists()
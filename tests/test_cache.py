@@ -0,0 +1,48 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api.cache import MemoryBackend, ResponseCache  # noqa: E402
+
+
+async def data_version() -> int:
+    return 1
+
+
+def create_app() -> FastAPI:
+    """The products listing behind the cache and CORS, registered as in app.py."""
+    app = FastAPI()
+
+    @app.get("/products/")
+    async def get_products():
+        return {"items": [{"id": 1}]}
+
+    app.middleware("http")(ResponseCache(MemoryBackend(), data_version))
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return app
+
+
+def test_cached_responses_keep_cors_headers():
+    client = TestClient(create_app())
+    origin = "http://localhost:8501"
+
+    miss = client.get("/products/", headers={"Origin": origin})
+    hit = client.get("/products/", headers={"Origin": origin})
+
+    assert miss.headers["X-Cache"] == "MISS"
+    assert hit.headers["X-Cache"] == "HIT"
+    for response in (miss, hit):
+        assert response.status_code == 200
+        assert response.json() == {"items": [{"id": 1}]}
+        assert response.headers["Access-Control-Allow-Origin"] == origin
@@ -0,0 +1,58 @@
+import asyncio
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from scraper.crawler import CrawlPipeline  # noqa: E402
+
+
+class FakeLoader:
+    """Fails the products with the given ASINs, loads the rest."""
+
+    def __init__(self, failed_asins):
+        self.failed_asins = failed_asins
+
+    def load_products(self, products_data):
+        failed = [
+            data.get("asin")
+            for data in products_data
+            if data.get("asin") in self.failed_asins
+        ]
+        return {
+            "inserted": len(products_data) - len(failed),
+            "updated": 0,
+            "skipped": 0,
+            "failed": len(failed),
+            "snapshots": 0,
+            "failed_asins": failed,
+        }
+
+
+class FakeFrontier:
+    def __init__(self):
+        self.completed = []
+        self.failed = []
+
+    def complete_items(self, item_ids):
+        self.completed.extend(item_ids)
+
+    def fail_items(self, item_ids, error):
+        self.failed.extend(item_ids)
+
+
+def test_flush_completes_only_loaded_items():
+    frontier = FakeFrontier()
+    pipeline = CrawlPipeline(None, FakeLoader({"B2", None}), frontier=frontier)
+    batch = [
+        (1, {"asin": "B1"}),
+        (2, {"asin": "B2"}),
+        (3, {"title": "No ASIN"}),
+        (4, {"asin": "B4"}),
+    ]
+
+    asyncio.run(pipeline._flush(batch))
+
+    assert frontier.completed == [1, 4]
+    assert sorted(frontier.failed) == [2, 3]
+    assert pipeline.stats["load_failed"] == 2
@@ -0,0 +1,30 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+import pytest  # noqa: E402
+
+from scraper.amazon_scraper import AmazonScraper  # noqa: E402
+from scraper.extraction import PRODUCT_FIELDS, extract_fields  # noqa: E402
+
+
+# A span with the rating classes plus another one comes before the rating
+RATING_POPOVER = """
+<div id="acrPopover">
+  <span class="a-size-base a-color-base a-text-bold">1.0</span>
+  <span class="a-size-base a-color-base">4.5</span>
+</div>
+"""
+
+
+@pytest.mark.parametrize("backend", ["bs4", "selectolax"])
+def test_rating_matches_legacy_extraction(backend):
+    legacy = AmazonScraper.extract_rating(BeautifulSoup(RATING_POPOVER, "html.parser"))
+    fields = extract_fields(
+        RATING_POPOVER, {"average_rating": PRODUCT_FIELDS["average_rating"]}, backend
+    )
+
+    assert legacy == 4.5
+    assert fields["average_rating"] == legacy
@@ -0,0 +1,154 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from frontier import FAILED, IN_FLIGHT, PENDING, CrawlFrontier  # noqa: E402
+
+
+class FakeResult:
+    rowcount = 0
+
+    def all(self):
+        return []
+
+    def first(self):
+        return None
+
+
+class RecordingSession:
+    """Records the statements the frontier sends, returns no rows."""
+
+    def __init__(self, statements: list):
+        self.statements = statements
+
+    def __call__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, statement, *args):
+        self.statements.append(statement)
+        return FakeResult()
+
+    scalars = execute
+
+    def commit(self):
+        pass
+
+
+class FakeDatabaseManager:
+    def __init__(self):
+        self.statements = []
+
+    def get_session(self):
+        return RecordingSession(self.statements)
+
+
+def create_frontier(**options) -> CrawlFrontier:
+    frontier = CrawlFrontier(FakeDatabaseManager(), worker_id="worker-1", **options)
+    frontier.run_id = 7
+    return frontier
+
+
+def compiled(frontier: CrawlFrontier):
+    """SQL and parameters of every statement sent, compiled for Postgres."""
+    statements = []
+    for statement in frontier.db_manager.statements:
+        compiled = statement.compile(dialect=postgresql.dialect())
+        statements.append((" ".join(str(compiled).split()), compiled.params))
+    return statements
+
+
+def assert_claims_free_and_expired_leases(sql: str, params: dict, table: str):
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    # Pending rows, or in flight rows whose lease ran out (e.g. a dead worker)
+    assert (
+        f"{table}.state = %(state_1)s OR {table}.state = %(state_2)s"
+        f" AND ({table}.lease_expires_at IS NULL OR {table}.lease_expires_at < now())"
+    ) in sql
+    assert (params["state_1"], params["state_2"]) == (PENDING, IN_FLIGHT)
+
+
+def test_claim_items_skips_locked_rows_and_reclaims_expired_leases():
+    frontier = create_frontier(lease_seconds=120)
+
+    assert frontier.claim_items(5) == []
+
+    [(sql, params)] = compiled(frontier)
+    assert sql.startswith("UPDATE crawl_frontier SET state=%(state)s")
+    assert_claims_free_and_expired_leases(sql, params, "crawl_frontier")
+    assert "lease_expires_at=(now() + %(now_1)s)" in sql
+    assert params["state"] == IN_FLIGHT
+    assert params["lease_owner"] == "worker-1"
+    assert params["now_1"].total_seconds() == 120
+    assert params["run_id_1"] == 7
+    assert params["param_1"] == 5
+
+
+def test_claim_search_page_skips_locked_rows_and_reclaims_expired_leases():
+    frontier = create_frontier()
+
+    assert frontier.claim_search_page() is None
+
+    [(sql, params)] = compiled(frontier)
+    assert sql.startswith("SELECT crawl_search_pages.id")
+    assert_claims_free_and_expired_leases(sql, params, "crawl_search_pages")
+    assert sql.endswith("LIMIT %(param_1)s FOR UPDATE SKIP LOCKED")
+
+
+def test_failed_items_retry_until_max_retries():
+    frontier = create_frontier(max_retries=3)
+
+    frontier.fail_items([11, 12], "Timeout")
+
+    [(sql, params)] = compiled(frontier)
+    assert (
+        "state=CASE WHEN (crawl_frontier.attempts + %(attempts_1)s < %(param_1)s)"
+        " THEN %(param_2)s ELSE %(param_3)s END"
+    ) in sql
+    assert (params["param_1"], params["param_2"], params["param_3"]) == (
+        3,
+        PENDING,
+        FAILED,
+    )
+    # Only the lease holder may fail an item, a lost lease belongs to another worker
+    assert "crawl_frontier.lease_owner = %(lease_owner_1)s" in sql
+    assert params["lease_owner_1"] == "worker-1"
+    assert params["lease_owner"] is None
+
+
+def test_heartbeat_extends_only_own_in_flight_leases():
+    frontier = create_frontier(lease_seconds=60)
+
+    frontier.heartbeat()
+
+    statements = compiled(frontier)
+    assert [sql.split()[1] for sql, _ in statements] == [
+        "crawl_search_pages",
+        "crawl_frontier",
+    ]
+    for sql, params in statements:
+        assert "SET lease_expires_at=(now() + %(now_1)s)" in sql
+        assert params["lease_owner_1"] == "worker-1"
+        assert params["state_1"] == IN_FLIGHT
+        assert params["now_1"].total_seconds() == 60
+
+
+def test_release_hands_own_in_flight_work_back():
+    frontier = create_frontier()
+
+    frontier.release()
+
+    for sql, params in compiled(frontier):
+        assert params["state"] == PENDING
+        assert params["lease_owner"] is None
+        assert params["lease_expires_at"] is None
+        assert params["lease_owner_1"] == "worker-1"
+        assert params["state_1"] == IN_FLIGHT
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from api.routers.products import get_product_history  # noqa: E402
+
+
+class Row(dict):
+    def _asdict(self) -> dict:
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeSession:
+    """Answers the snapshot before `start`, then the bucketed snapshots."""
+
+    def __init__(self, previous, buckets):
+        self.results = [FakeResult([previous]), FakeResult(buckets)]
+
+    async def get(self, model, product_id):
+        return SimpleNamespace(id=product_id)
+
+    async def execute(self, statement):
+        return self.results.pop(0)
+
+
+def bucket(hour: int, first_captured_at: datetime, price: float) -> Row:
+    """One hour bucket holding a single snapshot."""
+    return Row(
+        time=datetime(2024, 6, 1, hour),
+        price=price,
+        min_price=price,
+        max_price=price,
+        average_rating=4.5,
+        review_count=10,
+        first_captured_at=first_captured_at,
+    )
+
+
+def history(db, start: datetime, end: datetime):
+    return asyncio.run(
+        get_product_history(
+            product_id=1, db=db, start=start, end=end, bucket="hour", max_points=200
+        )
+    )
+
+
+def test_snapshot_sharing_the_carried_points_time_replaces_it():
+    start, end = datetime(2024, 6, 1, 10), datetime(2024, 6, 1, 12)
+    previous = SimpleNamespace(price=20.0, average_rating=4.0, review_count=8)
+    db = FakeSession(
+        previous,
+        [
+            bucket(10, start, 25.0),
+            bucket(11, datetime(2024, 6, 1, 11, 5), 30.0),
+        ],
+    )
+
+    points = history(db, start, end).points
+
+    assert [point.time for point in points] == [start, datetime(2024, 6, 1, 11)]
+    first = points[0]
+    assert (first.price, first.min_price, first.max_price) == (25.0, 25.0, 25.0)
+
+
+def test_first_bucket_before_start_is_labelled_start():
+    start, end = datetime(2024, 6, 1, 10, 30), datetime(2024, 6, 1, 12)
+    previous = SimpleNamespace(price=20.0, average_rating=4.0, review_count=8)
+    db = FakeSession(
+        previous,
+        [
+            bucket(10, datetime(2024, 6, 1, 10, 45), 25.0),
+            bucket(11, datetime(2024, 6, 1, 11, 5), 30.0),
+        ],
+    )
+
+    points = history(db, start, end).points
+
+    assert [point.time for point in points] == [start, datetime(2024, 6, 1, 11)]
+    # 20.0 held from start until the snapshot at 10:45
+    first = points[0]
+    assert (first.price, first.min_price, first.max_price) == (25.0, 20.0, 25.0)
@@ -0,0 +1,91 @@
+import importlib.util
+from pathlib import Path
+import re
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import pytest  # noqa: E402
+import sqlalchemy as sa  # noqa: E402
+
+from database import (  # noqa: E402
+    CrawlItemDB,
+    CrawlRunDB,
+    CrawlSearchPageDB,
+    ProductDB,
+    ReviewDB,
+)
+
+
+INITIAL_SCHEMA = (
+    Path(__file__).resolve().parents[1]
+    / "app"
+    / "migrations"
+    / "versions"
+    / "0001_initial_schema.py"
+)
+
+ADD_COLUMN = re.compile(r"ALTER TABLE (\w+) ADD COLUMN IF NOT EXISTS (\w+)")
+
+TABLES = (ProductDB, ReviewDB, CrawlRunDB, CrawlSearchPageDB, CrawlItemDB)
+
+LEASE_COLUMNS = {"lease_owner", "lease_expires_at"}
+
+
+def columns(model) -> set:
+    return {column.name for column in model.__table__.columns}
+
+
+# What create_all left behind before the schema moved to Alembic: the
+# original products and reviews tables, and the crawl tables from before
+# their leases
+PRE_ALEMBIC_SCHEMA = {
+    "products": columns(ProductDB) - {"scraped_at", "search_vector"},
+    "reviews": columns(ReviewDB),
+    "crawl_runs": columns(CrawlRunDB),
+    "crawl_search_pages": columns(CrawlSearchPageDB) - LEASE_COLUMNS,
+    "crawl_frontier": columns(CrawlItemDB) - LEASE_COLUMNS,
+}
+
+
+class RecordingOp:
+    """Applies the migration's DDL to a schema of table and column names."""
+
+    def __init__(self, schema: dict):
+        self.schema = schema
+
+    def get_bind(self):
+        return SimpleNamespace(scalar=lambda statement: 1)
+
+    def create_table(self, name, *items):
+        self.schema[name] = {item.name for item in items if isinstance(item, sa.Column)}
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def execute(self, statement):
+        match = ADD_COLUMN.match(str(statement))
+        if match:
+            self.schema[match[1]].add(match[2])
+
+
+@pytest.mark.parametrize(
+    "existing", [{}, PRE_ALEMBIC_SCHEMA], ids=["fresh", "pre_alembic"]
+)
+def test_initial_schema_has_every_model_column(monkeypatch, existing):
+    spec = importlib.util.spec_from_file_location("initial_schema", INITIAL_SCHEMA)
+    revision = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(revision)
+    schema = {table: set(names) for table, names in existing.items()}
+    monkeypatch.setattr(revision, "op", RecordingOp(schema))
+    monkeypatch.setattr(
+        revision.sa,
+        "inspect",
+        lambda bind: SimpleNamespace(get_table_names=lambda: list(existing)),
+    )
+
+    revision.upgrade()
+
+    for model in TABLES:
+        assert columns(model) <= schema[model.__tablename__], model.__tablename__
@@ -0,0 +1,135 @@
+import asyncio
+import json
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import pytest  # noqa: E402
+from sqlalchemy import Column, Float, Integer, create_engine  # noqa: E402
+from sqlalchemy import column, func, select, table  # noqa: E402
+from sqlalchemy.orm import Session, declarative_base  # noqa: E402
+
+from api.exceptions import InvalidParameterError  # noqa: E402
+from api.pagination import Keyset, estimate_count, paginate  # noqa: E402
+
+
+products = table("products", column("id"), column("search_vector"))
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    price = Column(Float, nullable=True)
+
+
+# Ties and NULLs, so pages cross both the id tiebreaker and the NULL range
+PRICES = [5.0, None, 3.0, 5.0, None, 1.0, 3.0, None, 8.0, 5.0, None, 2.0]
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeSession:
+    """Records the statements sent to it and answers with a planner estimate."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.executed = []
+
+    async def execute(self, statement, params=None):
+        self.executed.append((str(statement), params))
+        return FakeResult(json.dumps([{"Plan": {"Plan Rows": self.rows}}]))
+
+
+def test_estimate_count_of_fulltext_search():
+    ts_query = func.websearch_to_tsquery("english", "steel watch")
+    query = (
+        select(products)
+        .where(products.c.search_vector.op("@@")(ts_query))
+        .order_by(products.c.id)
+    )
+    db = FakeSession(rows=42)
+
+    assert asyncio.run(estimate_count(db, query)) == 42
+
+    sql, params = db.executed[0]
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "ORDER BY" not in sql
+    assert sorted(params.values()) == ["english", "steel watch"]
+
+
+class AsyncSessionAdapter:
+    """The async session methods paginate uses, over a sync SQLite session."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement):
+        return self.session.execute(statement)
+
+    async def scalars(self, statement):
+        return self.session.scalars(statement)
+
+    async def scalar(self, statement):
+        return self.session.scalar(statement)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Item(id=i, price=price) for i, price in enumerate(PRICES, 1))
+        session.commit()
+        yield AsyncSessionAdapter(session)
+
+
+def read_all_pages(db, keyset: Keyset, limit: int) -> list:
+    pages, cursor = [], None
+    while True:
+        items, metadata = asyncio.run(
+            paginate(db, select(Item), limit=limit, keyset=keyset, cursor=cursor)
+        )
+        pages.append(items)
+        if not metadata.has_next:
+            return pages
+        cursor = metadata.next_cursor
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 20])
+def test_cursor_pages_cover_every_row_once_in_order(db, order, limit):
+    keyset = Keyset("price", Item.price, Item.id, order)
+    expected = db.session.scalars(select(Item).order_by(*keyset.order_by())).all()
+
+    pages = read_all_pages(db, keyset, limit)
+
+    ids = [item.id for page in pages for item in page]
+    assert ids == [item.id for item in expected]
+    assert all(len(page) == limit for page in pages[:-1])
+    assert expected[-1].price is None
+
+
+@pytest.mark.parametrize(
+    "issued, used",
+    [
+        (("price", "asc"), ("price", "desc")),
+        (("price", "asc"), ("rating", "asc")),
+    ],
+)
+def test_cursor_of_another_sort_is_rejected(db, issued, used):
+    issuer = Keyset(issued[0], Item.price, Item.id, issued[1])
+    cursor = issuer.cursor_for(Item(id=1, price=5.0))
+    keyset = Keyset(used[0], Item.price, Item.id, used[1])
+
+    with pytest.raises(InvalidParameterError):
+        asyncio.run(paginate(db, select(Item), keyset=keyset, cursor=cursor))
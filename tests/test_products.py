@@ -0,0 +1,37 @@
+import asyncio
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import pytest  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from api.routers.products import load_first_reviews  # noqa: E402
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return []
+
+
+@pytest.mark.parametrize("per_product, limited", [(None, False), (3, True)])
+def test_first_reviews_are_only_limited_when_asked(per_product, limited):
+    db = RecordingSession()
+
+    reviews = asyncio.run(load_first_reviews(db, [1, 2], per_product, "review_date"))
+
+    assert reviews == {1: [], 2: []}
+    [sql] = db.statements
+    assert ("LIMIT" in sql) == limited
+
+
+def test_no_reviews_are_loaded_for_zero_per_product():
+    db = RecordingSession()
+
+    assert asyncio.run(load_first_reviews(db, [1], 0, "rating")) == {1: []}
+    assert db.statements == []
@@ -0,0 +1,96 @@
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+import pytest  # noqa: E402
+
+from scraper.rate_limiter import AdaptiveRateLimiter  # noqa: E402
+
+
+URL = "https://www.amazon.com/dp/B000000001"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def create_limiter(clock, **options) -> AdaptiveRateLimiter:
+    options = {
+        "target_rate": 1.0,
+        "min_rate": 0.1,
+        "increase": 0.1,
+        "decrease_factor": 0.5,
+        "cooldown": 10,
+        "max_cooldown": 40,
+        **options,
+    }
+    return AdaptiveRateLimiter(clock=clock, **options)
+
+
+def host_metrics(limiter: AdaptiveRateLimiter) -> dict:
+    return limiter.metrics()["www.amazon.com"]
+
+
+def test_throttle_halves_rate_and_success_adds_it_back(clock):
+    limiter = create_limiter(clock)
+
+    limiter.on_throttle(URL, "captcha")
+    assert host_metrics(limiter)["rate"] == 0.5
+    assert host_metrics(limiter)["state"] == "backoff"
+
+    clock.now += 10
+    for expected in (0.6, 0.7, 0.8, 0.9, 1.0, 1.0):
+        limiter.on_success(URL)
+        assert host_metrics(limiter)["rate"] == expected
+    assert host_metrics(limiter)["state"] == "normal"
+
+
+def test_throttles_during_cooldown_decrease_once(clock):
+    limiter = create_limiter(clock)
+
+    limiter.on_throttle(URL, "captcha")
+    clock.now += 9
+    limiter.on_throttle(URL, "http_503")
+    limiter.on_throttle(URL, "captcha")
+
+    metrics = host_metrics(limiter)
+    assert metrics["rate"] == 0.5
+    assert metrics["throttle_events"] == {"captcha": 2, "http_503": 1}
+
+
+def test_cooldown_doubles_per_event_up_to_max(clock):
+    limiter = create_limiter(clock)
+    bucket = limiter._bucket(URL)
+
+    cooldowns = []
+    for _ in range(4):
+        limiter.on_throttle(URL, "captcha")
+        cooldowns.append(bucket.backoff_until - clock.now)
+        clock.now = bucket.backoff_until
+    assert cooldowns == [10, 20, 40, 40]
+
+    # A success resets the backoff to the base cooldown
+    limiter.on_success(URL)
+    limiter.on_throttle(URL, "captcha")
+    assert bucket.backoff_until - clock.now == 10
+
+
+def test_rate_never_drops_below_min_rate(clock):
+    limiter = create_limiter(clock)
+    bucket = limiter._bucket(URL)
+
+    for _ in range(10):
+        limiter.on_throttle(URL, "http_429")
+        clock.now = bucket.backoff_until
+
+    assert host_metrics(limiter)["rate"] == 0.1